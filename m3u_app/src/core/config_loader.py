@@ -31,6 +31,26 @@ class ConfigSettings:
     enable_compression: bool
     cleanup_on_startup: bool
     timezone: str
+    # Optional tuning keys (defaults keep older settings.json valid)
+    max_parallel_downloads: int = 4
+    breaker_failure_threshold: int = 3
+    breaker_cooldown_hours: int = 24
+    profile: bool = False
+    profile_top_n: int = 25
+    xml_workers: int = 0  # 0 = one process per CPU, 1 = in-process
+    diagnostics_max_entries: int = 5000
+    diagnostics_sample_size: int = 5
+    diagnostics_flush_interval_s: int = 30
+    stream_probe_enabled: bool = False
+    stream_probe_mode: str = "reorder"  # reorder | prune
+    stream_probe_connections: int = 16
+    stream_probe_budget_s: int = 120
+    stream_probe_timeout_s: int = 5
+    stream_probe_ttl_hours: int = 24
+    publish_outputs: bool = False  # nginx_dir/*.m3u + tvh_xml_dir/*.xml; off until ChannelProcessor lands
+    lineup_mode: str = "sequential"  # sequential | interval (pack by API time)
+    log_max_total_mb: int = 2048  # Disk budget for logs/ on top of log_retention_days (0 = off)
+    lazy_m3u_records: bool = False  # Keep #EXTINF bytes, decode on access, pass through unchanged
 
 
 
@@ -143,12 +163,21 @@ class ConfigLoader:
     def _load_m3u_sources(self) -> None:
         with open(self.m3u_dir / "m3u_sources.csv", newline='') as f:
             reader = csv.DictReader(f)
-            self.m3u_sources = list(reader)
+            self.m3u_sources = [self._normalize_source_row(row) for row in reader]
 
     def _load_xml_sources(self) -> None:
         with open(self.m3u_dir / "xml_sources.csv", newline='') as f:
             reader = csv.DictReader(f)
-            self.xml_sources = list(reader)
+            self.xml_sources = [self._normalize_source_row(row) for row in reader]
+
+    @staticmethod
+    def _normalize_source_row(row: Dict[str, str]) -> Dict[str, str]:
+        """Header tolerance: "URL"/"Output Name" → "url"/"output_name"."""
+        return {
+            (key or "").strip().lower().replace(" ", "_"): (value or "").strip()
+            for key, value in row.items()
+            if key is not None  # DictReader restkey for surplus columns
+        }
 
     def _load_sports_config(self) -> None:
         with open(self.sports_dir / "sports_config.json") as f:
@@ -223,7 +252,18 @@ class ConfigLoader:
             "network_timeout": 30, "max_retries": 3, "retry_delay": 10,
             "log_retention_days": 14, "log_level": "DEBUG",
             "enable_compression": True, "cleanup_on_startup": True,
-            "timezone": "America/Boise"
+            "timezone": "America/Boise",
+            "max_parallel_downloads": 4, "breaker_failure_threshold": 3,
+            "breaker_cooldown_hours": 24,
+            "profile": False, "profile_top_n": 25, "xml_workers": 0,
+            "diagnostics_max_entries": 5000, "diagnostics_sample_size": 5,
+            "diagnostics_flush_interval_s": 30,
+            "stream_probe_enabled": False, "stream_probe_mode": "reorder",
+            "stream_probe_connections": 16, "stream_probe_budget_s": 120,
+            "stream_probe_timeout_s": 5, "stream_probe_ttl_hours": 24,
+            "publish_outputs": False,
+            "lineup_mode": "sequential", "lazy_m3u_records": False,
+            "log_max_total_mb": 2048
         })
 
     def _template_csv(self, path: Path) -> None:
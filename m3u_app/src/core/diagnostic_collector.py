@@ -1,69 +1,200 @@
 # src/core/diagnostic_collector.py
 """
-Diagnostic collector for unmapped games, teams, and categories.
-Writes JSON diagnostics to run folder at end of pipeline.
+Diagnostic collector for unmapped games, teams, categories, source health,
+per-provider stream liveness and per-league lineup summaries.
+Aggregates repeats by key with occurrence counts and capped samples, so the
+same matchup from every provider/duplicate stream costs one entry.
+Writes JSON diagnostics to run folder, streamed entry by entry, on every
+flush() (periodic + end of pipeline) so a crashed run keeps its diagnostics.
 """
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict
+from typing import Any, Dict, Iterable, List, Tuple
 import json
+import os
+import threading
+import time
+
+DiagnosticKey = Tuple[str, Tuple[str, ...], str]  # (league, sorted teams, reason)
+
+
+@dataclass
+class DiagnosticEntry:
+    """One aggregated failure: league + teams + reason."""
+    league: str
+    teams: List[str]
+    reason: str
+    count: int = 0
+    providers: List[str] = field(default_factory=list)          # capped sample
+    raw_display_names: List[str] = field(default_factory=list)  # capped sample
+
+    def add(self, provider: str, raw_display_name: str, sample_size: int) -> None:
+        self.count += 1
+        if provider and provider not in self.providers and len(self.providers) < sample_size:
+            self.providers.append(provider)
+        if (raw_display_name and raw_display_name not in self.raw_display_names
+                and len(self.raw_display_names) < sample_size):
+            self.raw_display_names.append(raw_display_name)
 
 
 @dataclass
 class DiagnosticCollector:
-    """Collects diagnostic data for debugging pipeline failures."""
+    """
+    Collects diagnostic data for debugging pipeline failures.
+    max_entries caps distinct keys per file; further new keys are only
+    counted (overflow) and reported in diagnostics_summary.json.
+    """
     base_dir: Path
     run_id: str
-    
-    unmapped_games: List[Dict] = field(default_factory=list)
-    missing_teams: List[Dict] = field(default_factory=list)
+    max_entries: int = 5000
+    sample_size: int = 5
+    flush_interval_s: float = 30.0
+
+    unmapped_games: Dict[DiagnosticKey, DiagnosticEntry] = field(default_factory=dict)
+    missing_teams: Dict[DiagnosticKey, DiagnosticEntry] = field(default_factory=dict)
     unmapped_categories: Dict[str, int] = field(default_factory=dict)
-    
-    def add_unmapped_game(self, 
-                         league: str, 
-                         team1_raw: str, 
-                         team2_raw: str, 
-                         reason: str, 
-                         provider: str = "") -> None:
+    source_health: Dict[str, Dict] = field(default_factory=dict)
+    stream_liveness: Dict[str, Dict] = field(default_factory=dict)  # provider → stats
+    lineup_summaries: Dict[str, Dict] = field(default_factory=dict)  # league → summary
+    overflow: Dict[str, int] = field(default_factory=dict)  # file → dropped occurrences
+
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+    _last_flush: float = field(default_factory=time.monotonic, repr=False)
+
+    def add_unmapped_game(self,
+                         league: str,
+                         team1_raw: str,
+                         team2_raw: str,
+                         reason: str,
+                         provider: str = "",
+                         raw_display_name: str = "") -> None:
         """Log M3U sports detection failure."""
-        self.unmapped_games.append({
-            "league": league,
-            "raw_display_name": f"{team1_raw} vs {team2_raw}",
-            "teams": [team1_raw, team2_raw],
-            "provider": provider,
-            "reason": reason
-        })
-    
-    def add_missing_team(self, 
-                        league: str, 
-                        teams: List[str], 
+        self._add(self.unmapped_games, "unmapped_games", league, [team1_raw, team2_raw],
+                  reason, provider, raw_display_name or f"{team1_raw} vs {team2_raw}")
+
+    def add_missing_team(self,
+                        league: str,
+                        teams: List[str],
                         reason: str) -> None:
         """Log API team lookup failure."""
-        self.missing_teams.append({
-            "league": league,
-            "teams": teams,
-            "reason": reason
-        })
-    
-    def add_unmapped_category(self, category: str) -> None:
-        """Log XML category mapping failure."""
-        self.unmapped_categories[category] = self.unmapped_categories.get(category, 0) + 1
-    
-    def dump_all(self) -> None:
-        """Write all diagnostics to JSON files in run folder."""
+        self._add(self.missing_teams, "missing_teams", league, teams, reason, "", "")
+
+    def add_unmapped_category(self, category: str, count: int = 1) -> None:
+        """Log XML category mapping failure (count: merged worker tallies)."""
+        with self._lock:
+            if (category not in self.unmapped_categories
+                    and len(self.unmapped_categories) >= self.max_entries):
+                self._overflow("unmapped_categories", count)
+            else:
+                self.unmapped_categories[category] = self.unmapped_categories.get(category, 0) + count
+        self._maybe_flush()
+
+    def add_source_health(self, summary: Dict[str, Dict]) -> None:
+        """Snapshot of SourceHealthStore.summary() after downloads."""
+        with self._lock:
+            self.source_health = summary
+
+    def add_stream_liveness(self, provider: str, stats: Dict[str, int]) -> None:
+        """Per-provider StreamProber counters (live/dead/unknown/pruned)."""
+        with self._lock:
+            self.stream_liveness[provider] = stats
+
+    def add_lineup_summary(self, league: str, summary: Dict) -> None:
+        """SportsLineupManager.get_lineup_summary() (channels before/after packing)."""
+        with self._lock:
+            self.lineup_summaries[league] = summary
+
+    def flush(self) -> None:
+        """Atomically (tmp → rename) rewrite every diagnostics file from current state."""
         diagnostics_dir = self.base_dir / self.run_id / "diagnostics"
         diagnostics_dir.mkdir(parents=True, exist_ok=True)
-        
-        diagnostics = [
-            ("unmapped_games.json", self.unmapped_games),
-            ("missing_teams.json", self.missing_teams),
-            ("unmapped_categories.json", self.unmapped_categories)
-        ]
-        
-        for filename, data in diagnostics:
-            filepath = diagnostics_dir / filename
-            # Ensure datetime serializable
-            filepath.write_text(
-                json.dumps(data, indent=2, default=str),
-                encoding="utf-8"
+
+        with self._lock:
+            self._last_flush = time.monotonic()
+            self._write_list(diagnostics_dir / "unmapped_games.json", self._sorted(self.unmapped_games))
+            self._write_list(diagnostics_dir / "missing_teams.json", self._sorted(self.missing_teams))
+            self._write_mapping(
+                diagnostics_dir / "unmapped_categories.json",
+                sorted(self.unmapped_categories.items(), key=lambda kv: (-kv[1], kv[0])),
             )
+            self._write_mapping(diagnostics_dir / "source_health.json", self.source_health.items())
+            self._write_mapping(diagnostics_dir / "stream_liveness.json", self.stream_liveness.items())
+            self._write_mapping(diagnostics_dir / "lineup_summary.json", self.lineup_summaries.items())
+            self._write_mapping(diagnostics_dir / "diagnostics_summary.json", self._summary().items())
+
+    def dump_all(self) -> None:
+        """Write all diagnostics to JSON files in run folder (final flush)."""
+        self.flush()
+
+    def _add(self, bucket: Dict[DiagnosticKey, DiagnosticEntry], name: str, league: str,
+             teams: List[str], reason: str, provider: str, raw_display_name: str) -> None:
+        key = (league or "", tuple(sorted(t or "" for t in teams)), reason)
+        with self._lock:
+            entry = bucket.get(key)
+            if entry is None:
+                if len(bucket) >= self.max_entries:
+                    self._overflow(name, 1)
+                    return
+                entry = bucket[key] = DiagnosticEntry(league=league, teams=list(teams), reason=reason)
+            entry.add(provider, raw_display_name, self.sample_size)
+        self._maybe_flush()
+
+    def _overflow(self, name: str, count: int) -> None:
+        self.overflow[name] = self.overflow.get(name, 0) + count
+
+    def _maybe_flush(self) -> None:
+        if time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def _summary(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "max_entries": self.max_entries,
+            "unmapped_games": {"distinct": len(self.unmapped_games),
+                               "occurrences": sum(e.count for e in self.unmapped_games.values())},
+            "missing_teams": {"distinct": len(self.missing_teams),
+                              "occurrences": sum(e.count for e in self.missing_teams.values())},
+            "unmapped_categories": {"distinct": len(self.unmapped_categories),
+                                    "occurrences": sum(self.unmapped_categories.values())},
+            "overflow": dict(self.overflow),
+        }
+
+    @staticmethod
+    def _sorted(bucket: Dict[DiagnosticKey, DiagnosticEntry]) -> Iterable[Dict]:
+        """Most frequent first; key order breaks ties (deterministic)."""
+        for key in sorted(bucket, key=lambda k: (-bucket[k].count, k)):
+            entry = bucket[key]
+            yield {
+                "league": entry.league,
+                "teams": entry.teams,
+                "reason": entry.reason,
+                "count": entry.count,
+                "providers": entry.providers,
+                "raw_display_names": entry.raw_display_names,
+            }
+
+    @staticmethod
+    def _write_list(path: Path, items: Iterable[Dict]) -> None:
+        """Streaming JSON array: one encoded entry per line."""
+        encoder = json.JSONEncoder(default=str, ensure_ascii=False)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for index, item in enumerate(items):
+                f.write(",\n  " if index else "\n  ")
+                f.write(encoder.encode(item))
+            f.write("\n]\n")
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _write_mapping(path: Path, items: Iterable[Tuple[str, Any]]) -> None:
+        """Streaming JSON object: one encoded key/value per line."""
+        encoder = json.JSONEncoder(default=str, ensure_ascii=False)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("{")
+            for index, (key, value) in enumerate(items):
+                f.write(",\n  " if index else "\n  ")
+                f.write(f"{encoder.encode(str(key))}: {encoder.encode(value)}")
+            f.write("\n}\n")
+        os.replace(tmp_path, path)
@@ -0,0 +1,177 @@
+# src/core/downloader.py
+"""
+SourceDownloader - HTTP fetch of M3U/XMLTV sources to spool files.
+Retry policy per outline (max_retries × retry_delay), gated by the
+SourceHealthStore circuit breaker. First attempts use the adaptive
+(TTFB-based) timeout; retries and half-open probes use network_timeout.
+Bodies are streamed to the run's spool dir (never held in memory); each
+stage reads its source from FetchResult.path when it needs it.
+"""
+import hashlib
+import http.client
+import os
+import shutil
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .config_loader import ConfigSettings
+from .profiler import profiled
+from .source_health import SourceHealthStore
+
+USER_AGENT = "m3uprocessor/1.0"
+READ_CHUNK = 1024 * 1024
+
+
+@dataclass
+class FetchResult:
+    """Outcome of one source download for this run."""
+    url: str
+    name: str
+    status: str  # "ok" | "failed" | "skipped"
+    path: str = ""  # Spooled body when ok
+    size: int = 0
+    attempts: int = 0
+    elapsed_s: float = 0.0
+    error: str = ""
+
+
+class SourceDownloader:
+    """
+    Downloads sources with retries, skipping sources whose breaker is open.
+    fetch_all() runs downloads in parallel, largest/slowest first.
+    """
+    def __init__(self,
+                 settings: ConfigSettings,
+                 health: SourceHealthStore,
+                 spool_dir: Path,
+                 logger,
+                 profiler=None):
+        self.settings = settings
+        self.health = health
+        self.spool_dir = Path(spool_dir)
+        self.logger = logger
+        self.profiler = profiler  # StageProfiler: per-thread pstats when profiling
+
+    def fetch(self, url: str, name: str = "") -> FetchResult:
+        """Download one source. Never raises - failures are in FetchResult."""
+        state, max_attempts = self.health.plan_attempts(url)
+        if state == "open":
+            streak = self.health.get(url).failure_streak
+            self.logger.warning(
+                "Source skipped - circuit open",
+                extra={"step": "download", "source": name, "url": url,
+                       "failure_streak": streak},
+            )
+            return FetchResult(url=url, name=name, status="skipped",
+                               error=f"circuit open after {streak} failed runs")
+
+        timeout = self.health.timeout_for(url, adaptive=state == "closed")
+        self.logger.debug(
+            "Download start",
+            extra={"step": "download", "source": name, "url": url,
+                   "breaker": state, "timeout_s": timeout, "max_attempts": max_attempts},
+        )
+
+        error = ""
+        started = time.perf_counter()
+        path = self.spool_path(url)
+        for attempt in range(1, max_attempts + 1):
+            self.health.record_attempt(url)
+            attempt_start = time.perf_counter()
+            if attempt > 1:
+                timeout = self.health.timeout_for(url, adaptive=False)
+            try:
+                size, ttfb = self._get(url, timeout, path)
+            except (urllib.error.URLError, http.client.HTTPException, OSError, ValueError) as e:
+                # HTTPException: IncompleteRead (truncated body), BadStatusLine, LineTooLong
+                error = str(e)
+                self.logger.warning(
+                    "Download attempt failed",
+                    extra={"step": "download", "source": name, "url": url,
+                           "attempt": attempt, "error": error},
+                )
+                if attempt < max_attempts:
+                    time.sleep(self.settings.retry_delay)
+                continue
+
+            latency = time.perf_counter() - attempt_start
+            self.health.record_success(url, latency, size, ttfb)
+            self.logger.debug(
+                "Download complete",
+                extra={"step": "download", "source": name, "url": url,
+                       "bytes": size, "elapsed_ms": int(latency * 1000),
+                       "ttfb_ms": int(ttfb * 1000)},
+            )
+            return FetchResult(url=url, name=name, status="ok", path=str(path), size=size,
+                               attempts=attempt,
+                               elapsed_s=time.perf_counter() - started)
+
+        self.health.record_failure(url, error)
+        self.logger.error(
+            "Source failed - all attempts exhausted",
+            extra={"step": "download", "source": name, "url": url,
+                   "attempts": max_attempts, "error": error},
+        )
+        return FetchResult(url=url, name=name, status="failed",
+                           attempts=max_attempts,
+                           elapsed_s=time.perf_counter() - started, error=error)
+
+    def fetch_all(self, sources: List[Dict[str, str]]) -> Dict[str, FetchResult]:
+        """
+        Download every source row (url, output_name) in parallel.
+        Returns: url → FetchResult (sources with a blank url are ignored)
+        """
+        names = {row["url"]: row.get("output_name", "") for row in sources if row.get("url")}
+        ordered = self.health.schedule(list(names))
+        workers = max(1, min(self.settings.max_parallel_downloads, len(ordered)))
+
+        # Executor starts tasks in submission order → schedule order is preserved
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as pool:
+            futures = {url: pool.submit(self._fetch_profiled, url, names[url]) for url in ordered}
+        return {url: self._result(futures[url], url, names[url]) for url in names}
+
+    def _fetch_profiled(self, url: str, name: str) -> FetchResult:
+        path = self.profiler.worker_profile_path(f"download_{name}") if self.profiler else ""
+        with profiled(path):
+            return self.fetch(url, name)
+
+    def _result(self, future: Future, url: str, name: str) -> FetchResult:
+        """Anything fetch() let escape becomes a failed source, never a failed run."""
+        try:
+            return future.result()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            self.health.record_failure(url, error)
+            self.logger.error(
+                "Source failed - unexpected error",
+                extra={"step": "download", "source": name, "url": url, "error": error},
+            )
+            return FetchResult(url=url, name=name, status="failed", error=error)
+
+    def spool_path(self, url: str) -> Path:
+        """Stable per-URL file in the spool dir (several rows may share a URL)."""
+        return self.spool_dir / hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _get(self, url: str, timeout: float, path: Path) -> Tuple[int, float]:
+        """Body → path (tmp → rename). Returns: (bytes, seconds until response headers arrived)."""
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        tmp_path = path.with_suffix(".tmp")
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                ttfb = time.perf_counter() - started
+                with open(tmp_path, "wb") as out:
+                    shutil.copyfileobj(response, out, READ_CHUNK)
+                    size = out.tell()
+                if response.length:  # Chunked reads end quietly on a short body
+                    raise http.client.IncompleteRead(b"", response.length)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()  # Failed attempt: no partial body left behind
+        return size, ttfb
@@ -11,14 +11,21 @@ class ChannelRecord:
     displayname: str = ""
     urls: List[str] = field(default_factory=list)
 
+    def attribute(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Same accessor as m3u.parser.LazyChannelRecord."""
+        return self.attributes.get(name, default)
+
+    def set_attribute(self, name: str, value: str) -> None:
+        self.attributes[name] = value
+
 @dataclass 
 class GameRecord:
     """Persists across providers until sports.xml."""
     league: str
     serviceprefix: str
     matchupkey: str  # "Buffalo Bills Pittsburgh Steelers" (alpha sorted)
-    team1canonical: str  # Alphabetical team 1
-    team2canonical: str  # Alphabetical team 2
+    team1canonical: str  # Alphabetical team 1 (away team once API-matched)
+    team2canonical: str  # Alphabetical team 2 (home team once API-matched)
     apiendpoint: str
     lineupid: int = 0
     channelassignment: int = 0  
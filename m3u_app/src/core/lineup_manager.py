@@ -3,10 +3,41 @@
 SportsLineupManager - Sequential team lineup assignment algorithm.
 Fills lineups with unique teams (no team duplication within lineup).
 Creates new lineups when teams repeat from existing lineups.
+
+Optional "interval" mode (pack_by_time): once API times are known, games
+that don't overlap share a channel (min channels = max concurrent games).
 """
+import heapq
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Set
-from .entities import GameRecord
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Set
+from .entities import ChannelRecord, GameRecord
+
+SEQUENTIAL = "sequential"
+INTERVAL = "interval"
+DEFAULT_GAME_DURATION = {"hours": 3, "minutes": 0}
+
+
+def tvg_id(game: GameRecord) -> str:
+    """'NBA.1' - the game's channel in both the provider M3U and sports.xml."""
+    return f"{game.serviceprefix}.{game.channelassignment}"
+
+
+def tvg_name(game: GameRecord) -> str:
+    """'NBA 1' - tvg-name / display name of that channel (sports.xml <display-name>)."""
+    return f"{game.serviceprefix} {game.channelassignment}"
+
+
+def apply_gamerecord_attributes(record: ChannelRecord, game: GameRecord) -> bool:
+    """Outline: tvg-id, tvg-name and display name follow the channel. Returns changed."""
+    channel_id, name = tvg_id(game), tvg_name(game)
+    if (record.attribute("tvg-id"), record.attribute("tvg-name"), record.displayname) == (
+            channel_id, name, name):
+        return False
+    record.set_attribute("tvg-id", channel_id)
+    record.set_attribute("tvg-name", name)
+    record.displayname = name
+    return True
 
 
 @dataclass
@@ -22,10 +53,13 @@ class SportsLineupManager:
     Sequential lineup assignment per league.
     Algorithm: Fill lineups 1→N with unique teams per lineup.
     """
-    def __init__(self, league_key: str, service_prefix: str):
+    def __init__(self, league_key: str, service_prefix: str, mode: str = SEQUENTIAL):
         self.league = league_key
         self.service_prefix = service_prefix
+        self.mode = mode
         self.lineups: List[Lineup] = []
+        self.channels_before: Optional[int] = None  # Set by pack_by_time()
+        self.channels_after: Optional[int] = None
     
     def assign_lineup(self, game: GameRecord) -> Tuple[str, int, int]:
         """
@@ -37,7 +71,7 @@ class SportsLineupManager:
         2. Find first lineup where both teams are unique
         3. Create new lineup if no match found
         """
-        team1, team2 = sorted([game.team1_canonical, game.team2_canonical])
+        team1, team2 = sorted([game.team1canonical, game.team2canonical])
         matchup_str = f"{team1} vs {team2}"
         
         # Sequential scan: lineup 1 → N
@@ -60,15 +94,78 @@ class SportsLineupManager:
         self.lineups.append(new_lineup)
         return self.service_prefix, 1, new_id
     
-    def get_lineup_summary(self) -> List[Dict]:
-        """Debug: Current lineup state."""
-        return [
-            {
-                "lineup_id": lineup.id,
-                "team_count": len(lineup.teams),
-                "game_count": len(lineup.games),
-                "teams": sorted(lineup.teams),
-                "games": lineup.games
-            }
-            for lineup in self.lineups
-        ]
+    def pack_by_time(self, games: List[GameRecord]) -> None:
+        """
+        Interval mode: reassign lineup_id/channel_assignment for all league games.
+        
+        Algorithm:
+        1. Lineups: sequential team-unique fill over games ordered by
+           (API time, matchup) - untimed games last, in given order
+        2. Timed games: interval scheduling - earliest start first, lowest
+           free channel whose previous game has ended, else a new channel
+        3. Untimed games: sequential position among the lineup's untimed games,
+           offset past the timed channels
+        Deterministic for a given input; channels_before/after for the summary.
+        Runs before any provider M3U is written: sports channels are restamped
+        from the packed channelassignment (m3u.writer.restamp_sports_channels).
+        """
+        self.channels_before = self._sequential_channel_count(games)
+
+        timed = sorted((g for g in games if g.apitime is not None),
+                       key=lambda g: (g.apitime, g.matchupkey))
+        untimed = [g for g in games if g.apitime is None]
+
+        self.lineups = []
+        for game in timed + untimed:
+            _, _, game.lineupid = self.assign_lineup(game)
+
+        free: List[int] = []                       # min-heap of released channels
+        busy: List[Tuple[datetime, int]] = []      # min-heap of (end, channel)
+        timed_channels = 0
+        for game in timed:
+            while busy and busy[0][0] <= game.apitime:
+                heapq.heappush(free, heapq.heappop(busy)[1])
+            if free:
+                channel = heapq.heappop(free)
+            else:
+                timed_channels += 1
+                channel = timed_channels
+            game.channelassignment = channel
+            heapq.heappush(busy, (game.apitime + self._duration(game), channel))
+
+        untimed_positions: Dict[int, int] = {}  # lineup_id → untimed games so far
+        for game in untimed:
+            untimed_positions[game.lineupid] = untimed_positions.get(game.lineupid, 0) + 1
+            game.channelassignment = timed_channels + untimed_positions[game.lineupid]
+
+        self.channels_after = max((g.channelassignment for g in games), default=0)
+
+    def _sequential_channel_count(self, games: List[GameRecord]) -> int:
+        """Channels the sequential algorithm needs for games (in given order)."""
+        baseline = SportsLineupManager(self.league, self.service_prefix)
+        return max((baseline.assign_lineup(game)[1] for game in games), default=0)
+
+    @staticmethod
+    def _duration(game: GameRecord) -> timedelta:
+        duration = game.gameduration or DEFAULT_GAME_DURATION
+        return timedelta(hours=duration.get("hours", 0), minutes=duration.get("minutes", 0))
+
+    def get_lineup_summary(self) -> Dict:
+        """Debug: Current lineup state + channel count before/after time packing."""
+        channels = max((len(lineup.games) for lineup in self.lineups), default=0)
+        return {
+            "league": self.league,
+            "mode": self.mode,
+            "channels_before": self.channels_before if self.channels_before is not None else channels,
+            "channels_after": self.channels_after if self.channels_after is not None else channels,
+            "lineups": [
+                {
+                    "lineup_id": lineup.id,
+                    "team_count": len(lineup.teams),
+                    "game_count": len(lineup.games),
+                    "teams": sorted(lineup.teams),
+                    "games": lineup.games
+                }
+                for lineup in self.lineups
+            ],
+        }
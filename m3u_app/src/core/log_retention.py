@@ -0,0 +1,279 @@
+# src/core/log_retention.py
+"""
+LogRetention - Background sweep of logs/YYYY-MM-DD/<run_id>/ folders.
+
+Started by RunManager after the 'current' symlink points at the new run,
+so startup never waits on it. One worker thread, in order:
+1. Expired date folders (older than log_retention_days in the configured
+   timezone) are renamed to .trash-* (instant), then removed
+2. Previous runs' *.log / *.log.N and diagnostics/*.json are gzipped
+   (settings.enable_compression): file.gz.tmp → rename → original removed
+3. log_max_total_mb: oldest runs are removed until the tree fits
+   (runs with files modified in the last ACTIVE_GRACE_S are skipped)
+The current run and whatever 'current' resolves to are never touched;
+leftover .trash-* / .gz.tmp from an interrupted sweep are cleaned next time.
+"""
+import gzip
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+
+from .logger import get_local_datetime, DATE_FOLDER_FORMAT
+
+TRASH_PREFIX = ".trash-"
+GZIP_TMP_SUFFIX = ".gz.tmp"
+COPY_CHUNK = 1024 * 1024
+ACTIVE_GRACE_S = 300  # Files touched this recently may belong to an overlapping run
+
+
+@dataclass
+class RetentionStats:
+    expired_folders: int = 0
+    compressed_files: int = 0
+    bytes_saved: int = 0
+    budget_removed_runs: int = 0
+    removed_bytes: int = 0
+    total_bytes: int = 0
+    errors: int = 0
+    elapsed_ms: int = 0
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _recently_modified(path: str, active_after: float) -> bool:
+    """Anything under path modified at/after active_after (unreadable counts as active)."""
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                if os.lstat(os.path.join(root, name)).st_mtime >= active_after:
+                    return True
+            except FileNotFoundError:
+                continue
+            except OSError:
+                return True
+    return False
+
+
+def _is_compressible(name: str, in_diagnostics: bool) -> bool:
+    if name.endswith(".gz") or name.endswith(GZIP_TMP_SUFFIX):
+        return False
+    if in_diagnostics:
+        return name.endswith(".json")
+    # processor.log and RotatingFileHandler backups processor.log.1 … .5
+    base, _, suffix = name.rpartition(".log")
+    return bool(base) and (suffix == "" or suffix[1:].isdigit())
+
+
+class LogRetention:
+    """Compress/expire/budget old run folders on a background thread."""
+    def __init__(self,
+                 base_logdir: str,
+                 current_run_root: str,
+                 tz_name: str,
+                 retention_days: int,
+                 max_total_mb: int,
+                 compress: bool,
+                 logger):
+        self.base_logdir = base_logdir
+        self.current_run_root = current_run_root
+        self.tz_name = tz_name
+        self.retention_days = retention_days
+        self.max_total_bytes = max_total_mb * 1024 * 1024
+        self.compress = compress
+        self.logger = logger
+        self.stats = RetentionStats()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LogRetention":
+        # Non-daemon: an in-flight gzip finishes even if the pipeline ends first
+        self._thread = threading.Thread(target=self._run, name="log-retention")
+        self._thread.start()
+        return self
+
+    def wait(self, timeout_s: float = 60.0) -> None:
+        """End of run: give the sweep timeout_s, then stop it after the current file."""
+        if self._thread is None:
+            return
+        self._thread.join(timeout_s)
+        if self._thread.is_alive():
+            self._stop.set()
+            self._thread.join()
+
+    def _run(self) -> None:
+        started = time.monotonic()
+        try:
+            protected = self._protected_paths()
+            self._expire(protected)
+            if self.compress:
+                self._compress_runs(protected)
+            if self.max_total_bytes > 0:
+                self._enforce_budget(protected)
+        except Exception as e:  # Never take the run down with it
+            self.stats.errors += 1
+            self.logger.error(
+                "Log retention sweep failed",
+                extra={"step": "log_retention", "error": str(e)},
+            )
+        self.stats.elapsed_ms = int((time.monotonic() - started) * 1000)
+        self.logger.info(
+            "Log retention sweep complete",
+            extra={"step": "log_retention", "stopped_early": self._stop.is_set(),
+                   **asdict(self.stats)},
+        )
+
+    def _protected_paths(self) -> Set[str]:
+        protected = {os.path.realpath(self.current_run_root)}
+        current_link = os.path.join(self.base_logdir, "current")
+        if os.path.lexists(current_link):
+            protected.add(os.path.realpath(current_link))
+        return protected
+
+    def _date_folders(self) -> List[str]:
+        """Date folder names, oldest first (non-date entries skipped)."""
+        try:
+            names = os.listdir(self.base_logdir)
+        except FileNotFoundError:
+            return []
+        folders = []
+        for name in names:
+            try:
+                datetime.strptime(name, DATE_FOLDER_FORMAT)
+            except ValueError:
+                continue
+            if os.path.isdir(os.path.join(self.base_logdir, name)):
+                folders.append(name)
+        return sorted(folders)
+
+    def _run_folders(self, protected: Set[str]) -> List[str]:
+        """Previous run folders, oldest first."""
+        runs = []
+        for date_name in self._date_folders():
+            date_path = os.path.join(self.base_logdir, date_name)
+            for run_name in sorted(os.listdir(date_path)):
+                run_path = os.path.join(date_path, run_name)
+                if os.path.isdir(run_path) and os.path.realpath(run_path) not in protected:
+                    runs.append(run_path)
+        return runs
+
+    def _is_protected_tree(self, path: str, protected: Set[str]) -> bool:
+        real = os.path.realpath(path)
+        return any(p == real or p.startswith(real + os.sep) for p in protected)
+
+    def _expire(self, protected: Set[str]) -> None:
+        # Cutoff in the configured timezone: date folders are named from local time
+        cutoff = get_local_datetime(self.tz_name).date() - timedelta(days=self.retention_days)
+        for name in self._date_folders():
+            date_path = os.path.join(self.base_logdir, name)
+            if datetime.strptime(name, DATE_FOLDER_FORMAT).date() >= cutoff:
+                continue
+            if self._is_protected_tree(date_path, protected):
+                continue
+            try:
+                os.rename(date_path, os.path.join(self.base_logdir, TRASH_PREFIX + name))
+                self.stats.expired_folders += 1
+            except OSError:
+                self.stats.errors += 1
+
+        for name in os.listdir(self.base_logdir):
+            if name.startswith(TRASH_PREFIX) and not self._stop.is_set():
+                trash_path = os.path.join(self.base_logdir, name)
+                self.stats.removed_bytes += _tree_size(trash_path)
+                shutil.rmtree(trash_path, ignore_errors=True)
+                self.logger.info(
+                    "Old log folder removed",
+                    extra={"step": "log_retention", "folder": name[len(TRASH_PREFIX):]},
+                )
+
+    def _compress_runs(self, protected: Set[str]) -> None:
+        active_after = time.time() - ACTIVE_GRACE_S
+        for run_path in self._run_folders(protected):
+            for root, _, files in os.walk(run_path):
+                in_diagnostics = os.path.basename(root) == "diagnostics"
+                for name in sorted(files):
+                    if self._stop.is_set():
+                        return
+                    path = os.path.join(root, name)
+                    if name.endswith(GZIP_TMP_SUFFIX):
+                        self._remove_leftover(path, active_after)
+                    elif _is_compressible(name, in_diagnostics):
+                        self._gzip(path, active_after)
+
+    def _gzip(self, path: str, active_after: float) -> None:
+        try:
+            stat = os.stat(path)
+            if stat.st_mtime >= active_after:
+                return
+            tmp_path = path + GZIP_TMP_SUFFIX
+            with open(path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK)
+            os.utime(tmp_path, (stat.st_atime, stat.st_mtime))
+            os.replace(tmp_path, path + ".gz")
+            os.remove(path)
+            self.stats.compressed_files += 1
+            self.stats.bytes_saved += stat.st_size - os.stat(path + ".gz").st_size
+        except OSError as e:
+            self.stats.errors += 1
+            self.logger.warning(
+                "Log compression failed",
+                extra={"step": "log_retention", "file": path, "error": str(e)},
+            )
+
+    def _remove_leftover(self, path: str, active_after: float) -> None:
+        """.gz.tmp of an interrupted sweep (a fresh one may be an overlapping sweep's)."""
+        try:
+            if os.stat(path).st_mtime < active_after:
+                os.remove(path)
+        except FileNotFoundError:
+            pass  # Finished or cleaned up by the other sweep
+        except OSError as e:
+            self.stats.errors += 1
+            self.logger.warning(
+                "Log cleanup failed",
+                extra={"step": "log_retention", "file": path, "error": str(e)},
+            )
+
+    def _enforce_budget(self, protected: Set[str]) -> None:
+        active_after = time.time() - ACTIVE_GRACE_S
+        runs = self._run_folders(protected)
+        sizes = {run: _tree_size(run) for run in runs}
+        total = sum(sizes.values()) + sum(_tree_size(p) for p in protected if os.path.isdir(p))
+        for run in runs:  # Oldest first
+            if total <= self.max_total_bytes or self._stop.is_set():
+                break
+            if _recently_modified(run, active_after):
+                continue  # May belong to an overlapping run still writing
+            shutil.rmtree(run, ignore_errors=True)
+            total -= sizes[run]
+            self.stats.budget_removed_runs += 1
+            self.stats.removed_bytes += sizes[run]
+            self.logger.info(
+                "Log run removed for disk budget",
+                extra={"step": "log_retention", "folder": run, "bytes": sizes[run]},
+            )
+            date_path = os.path.dirname(run)
+            try:
+                if not os.listdir(date_path):
+                    os.rmdir(date_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:  # Raced by another sweep/run, or not permitted
+                self.stats.errors += 1
+                self.logger.warning(
+                    "Empty log date folder not removed",
+                    extra={"step": "log_retention", "folder": date_path, "error": str(e)},
+                )
+        self.stats.total_bytes = total
@@ -0,0 +1,214 @@
+# src/core/profiler.py
+"""
+StageProfiler - On-demand deep profiling of orchestrator pipeline stages.
+Enabled via `--profile` or settings.json "profile": true. When disabled,
+stage() only records wall time (two perf_counter calls, no instrumentation)
+and logs it as step="stage" for the main log / load-test harness.
+
+Per stage, written to {run_root}/profile/ (next to diagnostics/):
+- NN_<stage>.pstats      cProfile stats (snakeviz / pstats compatible)
+- NN_<stage>_alloc.txt   tracemalloc top-N allocation sites + peak
+- NN_<stage>.collapsed   sampled stacks, flamegraph.pl collapsed format
+- NN_<stage>_workers/    one .pstats per download thread / XMLTV worker process
+- NN_<stage>_workers.pstats  the above merged
+- stages.json            wall time / peak memory index of all stages
+
+Before Python 3.12 cProfile only instruments the thread that enabled it, so
+NN_<stage>.pstats of a stage that fans out (download, generic_epg) mostly
+shows the parent waiting on locks/joins. Those stages pass
+worker_profile_path() to their threads/processes, which profile themselves
+via profiled(). On 3.12+ the stage profile sees every thread and a second
+profiler can't be enabled, so only worker processes write their own. tracemalloc
+covers the parent process only: XMLTV worker allocations are not in
+NN_<stage>_alloc.txt (the load-test's peak RSS children figure covers them).
+"""
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+PROFILE_DIRNAME = "profile"
+SAMPLE_INTERVAL_S = 0.005
+
+
+@contextmanager
+def profiled(path: Optional[str]) -> Iterator[None]:
+    """cProfile the calling thread into path ("" / None → no-op). Picklable-friendly for workers."""
+    if not path:
+        yield
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # 3.12+: one profiler per interpreter, and the active stage profile
+        # already covers every thread - no per-thread file
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.disable()
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(path)
+        except Exception:
+            pass  # Best effort: never fail the profiled work over its profile
+
+
+class _StackSampler(threading.Thread):
+    """Daemon thread sampling every other thread's stack into collapsed form."""
+
+    def __init__(self, interval_s: float = SAMPLE_INTERVAL_S):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval_s):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self.stacks[self._collapse(names.get(thread_id, "thread"), frame)] += 1
+
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        parts: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{Path(code.co_filename).name}:{code.co_name}")
+            frame = frame.f_back
+        parts.append(thread_name)
+        return ";".join(reversed(parts))
+
+
+class StageProfiler:
+    """
+    Wraps pipeline stages with cProfile + tracemalloc + stack sampling.
+    Usage: with profiler.stage("download"): ...
+    """
+    def __init__(self, run_root: str, enabled: bool, top_n: int, logger):
+        self.enabled = enabled
+        self.top_n = top_n
+        self.logger = logger
+        self.output_dir = Path(run_root) / PROFILE_DIRNAME
+        self.stages: List[Dict] = []
+        self.timings: Dict[str, int] = {}  # stage → elapsed_ms (always recorded)
+        self._current_prefix: Optional[str] = None
+
+    def worker_profile_path(self, label: str) -> str:
+        """pstats path for one thread/process of the running stage ("" when not profiling)."""
+        if not self.enabled or self._current_prefix is None:
+            return ""
+        safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in label)
+        return str(self.output_dir / f"{self._current_prefix}_workers" / f"{safe}.pstats")
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time one stage; deep-profile it only when enabled."""
+        started = time.perf_counter()
+        try:
+            if self.enabled:
+                with self._profiled_stage(name):
+                    yield
+            else:
+                yield
+        finally:
+            elapsed_ms = int((time.perf_counter() - started) * 1000)
+            self.timings[name] = elapsed_ms
+            self.logger.info(
+                "Stage complete",
+                extra={"step": "stage", "stage": name, "elapsed_ms": elapsed_ms},
+            )
+
+    @contextmanager
+    def _profiled_stage(self, name: str) -> Iterator[None]:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        prefix = f"{len(self.stages) + 1:02d}_{name}"
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        sampler = _StackSampler()
+        profile = cProfile.Profile()
+
+        started = time.perf_counter()
+        self._current_prefix = prefix
+        sampler.start()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._current_prefix = None
+            stacks = sampler.stop()
+            elapsed = time.perf_counter() - started
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+
+            profile.dump_stats(str(self.output_dir / f"{prefix}.pstats"))
+            self._write_allocations(self.output_dir / f"{prefix}_alloc.txt", snapshot, peak)
+            self._write_collapsed(self.output_dir / f"{prefix}.collapsed", stacks)
+            workers = self._merge_workers(prefix)
+
+            self.stages.append({
+                "stage": name,
+                "prefix": prefix,
+                "elapsed_ms": int(elapsed * 1000),
+                "peak_traced_bytes": peak,
+                "samples": sum(stacks.values()),
+                "worker_profiles": workers,
+            })
+            self._write_index()
+            self.logger.info(
+                "Stage profiled",
+                extra={"step": "profile", "stage": name, "elapsed_ms": int(elapsed * 1000),
+                       "peak_traced_bytes": peak, "output": str(self.output_dir)},
+            )
+
+    def _merge_workers(self, prefix: str) -> int:
+        """NN_<stage>_workers/*.pstats → NN_<stage>_workers.pstats. Returns: file count."""
+        files = sorted(str(p) for p in (self.output_dir / f"{prefix}_workers").glob("*.pstats"))
+        if files:
+            pstats.Stats(*files).dump_stats(str(self.output_dir / f"{prefix}_workers.pstats"))
+        return len(files)
+
+    def _write_allocations(self, path: Path, snapshot, peak: int) -> None:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        stats = snapshot.statistics("lineno")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"peak_traced_bytes: {peak}\n")
+            f.write(f"live_traced_bytes: {sum(s.size for s in stats)}\n\n")
+            for index, stat in enumerate(stats[:self.top_n], 1):
+                f.write(f"#{index}: {stat}\n")
+
+    @staticmethod
+    def _write_collapsed(path: Path, stacks: Counter) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+    def _write_index(self) -> None:
+        with open(self.output_dir / "stages.json", "w", encoding="utf-8") as f:
+            json.dump(self.stages, f, indent=2)
@@ -1,11 +1,10 @@
 # src/core/runmanager.py
 import os
-import shutil
-from datetime import datetime, timedelta
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional
 
 from .config_loader import ConfigLoader, ConfigError
+from .log_retention import LogRetention
 from .logger import (
     setup_logging, get_local_datetime,
     LOCAL_FORMAT, DATE_FOLDER_FORMAT
@@ -21,6 +20,7 @@ class RunContext:
     diagnostics_dir: str      # /opt/m3uapp/logs/2026-02-05/2026-02-05_19-27-30/diagnostics
     config_loader: ConfigLoader  # Pass loader instance, access via dot notation
     loggers: Dict[str, object]   # processor, sports_api, xml_filter, main
+    retention: Optional[LogRetention] = None  # Background sweep; orchestrator wait()s at shutdown
 
 
 class RunManager:
@@ -30,8 +30,8 @@ class RunManager:
     - Create timestamped log folder: logs/YYYY-MM-DD/YYYY-MM-DD_HH-MM-SS/
     - Create diagnostics/ subfolder  
     - Setup structured JSON logging with run_id prefix + config-driven timezone
-    - Cleanup old runs if settings.cleanup_on_startup
     - Atomic 'current' symlink update
+    - Background log retention (compress/expire/budget) if settings.cleanup_on_startup
     """
 
     def __init__(self, base_dir: str):
@@ -82,13 +82,22 @@ class RunManager:
             },
         )
 
-        # 6. Cleanup old runs if enabled (AFTER logging setup)
-        if cleanup_on_startup:
-            self._cleanup_old_runs(base_log_dir, log_retention_days, main_logger)
-
-        # 7. Atomic symlink update (AFTER logging setup)
+        # 6. Atomic symlink update (AFTER logging setup)
         self._update_current_symlink(base_log_dir, run_root, main_logger)
 
+        # 7. Retention sweep in the background (AFTER symlink: never touches its target)
+        retention = None
+        if cleanup_on_startup:
+            retention = LogRetention(
+                base_logdir=base_log_dir,
+                current_run_root=run_root,
+                tz_name=tz_name,
+                retention_days=log_retention_days,
+                max_total_mb=config.settings.log_max_total_mb,
+                compress=config.settings.enable_compression,
+                logger=main_logger,
+            ).start()
+
         # 8. Create immutable context with config_loader instance
         self.context = RunContext(
             run_id=run_id,
@@ -97,30 +106,10 @@ class RunManager:
             diagnostics_dir=diagnostics_dir,
             config_loader=self.config_loader,
             loggers=loggers,
+            retention=retention,
         )
         return self.context
 
-    def _cleanup_old_runs(self, base_logdir: str, retention_days: int, logger) -> None:
-        """Delete date folders older than retention_days per outline."""
-        cutoff = get_local_datetime().date() - timedelta(days=retention_days)
-        try:
-            for name in os.listdir(base_logdir):
-                date_path = os.path.join(base_logdir, name)
-                if not os.path.isdir(date_path):
-                    continue
-                try:
-                    folder_date = datetime.strptime(name, DATE_FOLDER_FORMAT).date()
-                except ValueError:
-                    continue  # Skip non-date folders
-                if folder_date < cutoff:
-                    shutil.rmtree(date_path, ignore_errors=True)
-                    logger.info(
-                        "Old log folder removed",
-                        extra={"step": "log_cleanup", "folder": date_path},
-                    )
-        except FileNotFoundError:
-            pass  # First run, log dir didn't exist yet
-
     def _update_current_symlink(self, base_logdir: str, run_root: str, logger) -> None:
         """Atomic symlink update: tmp → rename per outline."""
         current_link = os.path.join(base_logdir, "current")
@@ -0,0 +1,166 @@
+# src/core/source_health.py
+"""
+Persisted per-source health history (survives between cron runs).
+Drives the download circuit breaker, adaptive timeouts and the
+largest/slowest-first download schedule.
+"""
+import json
+import os
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config_loader import ConfigSettings
+from .logger import UTC_FORMAT
+
+# Exponentially weighted moving average factor for latency/bytes history
+EWMA_ALPHA = 0.3
+# Adaptive timeout = observed time-to-first-byte * factor + headroom, clamped to
+# network_timeout. urlopen's timeout bounds each socket operation (connect, each
+# read), so it is derived from TTFB rather than the full transfer time.
+TIMEOUT_FACTOR = 3.0
+TIMEOUT_HEADROOM = 5.0
+MIN_TIMEOUT = 5.0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_utc(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.strptime(value, UTC_FORMAT).replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class SourceHealth:
+    """Rolling health state for a single source URL."""
+    url: str
+    attempts: int = 0
+    successes: int = 0
+    failure_streak: int = 0
+    last_success: Optional[str] = None  # UTC_FORMAT
+    last_attempt: Optional[str] = None  # UTC_FORMAT
+    last_error: str = ""
+    latency_s: Optional[float] = None  # EWMA of full download time (schedule)
+    ttfb_s: Optional[float] = None     # EWMA of time to response headers (timeout)
+    bytes: Optional[float] = None      # EWMA of payload size
+
+
+@dataclass
+class SourceHealthStore:
+    """
+    JSON-backed health store: {url: SourceHealth}.
+
+    Circuit breaker per source:
+    - closed: failure_streak < breaker_failure_threshold → normal retries
+    - open: streak reached, last attempt within cooldown → skip
+    - half-open: cooldown elapsed → probe once (single attempt, no retries)
+    """
+    path: Path
+    settings: ConfigSettings
+    sources: Dict[str, SourceHealth] = field(default_factory=dict)
+
+    def load(self) -> "SourceHealthStore":
+        """Load history; a missing or corrupt file starts a fresh history."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.sources = {url: SourceHealth(**entry) for url, entry in data.items()}
+        except (FileNotFoundError, json.JSONDecodeError, TypeError):
+            self.sources = {}
+        return self
+
+    def save(self) -> None:
+        """Atomic write: tmp → rename."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({url: asdict(h) for url, h in self.sources.items()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, url: str) -> SourceHealth:
+        return self.sources.setdefault(url, SourceHealth(url=url))
+
+    def plan_attempts(self, url: str) -> Tuple[str, int]:
+        """
+        Circuit breaker decision for this run.
+        Returns: (state, max_attempts) where state is closed/half_open/open
+        """
+        health = self.get(url)
+        if health.failure_streak < self.settings.breaker_failure_threshold:
+            return "closed", max(1, self.settings.max_retries)
+
+        last_attempt = _parse_utc(health.last_attempt)
+        cooldown = timedelta(hours=self.settings.breaker_cooldown_hours)
+        if last_attempt is None or _utcnow() - last_attempt >= cooldown:
+            return "half_open", 1
+        return "open", 0
+
+    def timeout_for(self, url: str, adaptive: bool = True) -> float:
+        """
+        Per-socket-operation timeout, never above network_timeout.
+        adaptive=False (retry after a failed attempt, half-open probe) → the
+        full network_timeout, so a source that slowed down can still recover
+        instead of timing out into a permanently open breaker.
+        """
+        ceiling = float(self.settings.network_timeout)
+        ttfb = self.get(url).ttfb_s
+        if not adaptive or ttfb is None:
+            return ceiling
+        adaptive_timeout = ttfb * TIMEOUT_FACTOR + TIMEOUT_HEADROOM
+        return min(ceiling, max(MIN_TIMEOUT, adaptive_timeout))
+
+    def schedule(self, urls: List[str]) -> List[str]:
+        """
+        Largest/slowest first (longest-processing-time scheduling).
+        Unknown sources go first: their cost is unbounded until observed.
+        """
+        def cost(url: str) -> Tuple[int, float, float]:
+            health = self.get(url)
+            if health.latency_s is None:
+                return (0, 0.0, 0.0)
+            return (1, -health.latency_s, -(health.bytes or 0.0))
+
+        return sorted(urls, key=cost)
+
+    def record_attempt(self, url: str) -> None:
+        health = self.get(url)
+        health.attempts += 1
+        health.last_attempt = _utcnow().strftime(UTC_FORMAT)
+
+    def record_success(self, url: str, latency_s: float, nbytes: int, ttfb_s: float) -> None:
+        health = self.get(url)
+        health.successes += 1
+        health.failure_streak = 0
+        health.last_error = ""
+        health.last_success = _utcnow().strftime(UTC_FORMAT)
+        health.latency_s = _ewma(health.latency_s, latency_s)
+        health.ttfb_s = _ewma(health.ttfb_s, ttfb_s)
+        health.bytes = _ewma(health.bytes, float(nbytes))
+
+    def record_failure(self, url: str, error: str) -> None:
+        """One failed run (all attempts exhausted) extends the streak."""
+        health = self.get(url)
+        health.failure_streak += 1
+        health.last_error = error
+
+    def summary(self) -> Dict[str, Dict]:
+        """Diagnostics view: per-source state, including breaker decision."""
+        result = {}
+        for url, health in sorted(self.sources.items()):
+            state, _ = self.plan_attempts(url)
+            result[url] = {
+                **asdict(health),
+                "breaker": state,
+                "timeout_s": round(self.timeout_for(url, adaptive=state == "closed"), 2),
+            }
+        return result
+
+
+def _ewma(previous: Optional[float], sample: float) -> float:
+    if previous is None:
+        return sample
+    return EWMA_ALPHA * sample + (1 - EWMA_ALPHA) * previous
@@ -0,0 +1,59 @@
+# src/epg/generic_epg.py
+"""
+GenericEPG - Master XML pass over every xml_sources.csv source.
+Keeps only channels whose tvg-id appears in nginx_dir/*.m3u, writes
+tvh_xml_dir/generic_epgs.xml via XMLTVFilter (category remap included).
+"""
+import re
+from pathlib import Path
+from typing import Dict, FrozenSet, List
+
+from ..core.downloader import FetchResult
+from .xml_processor import XMLTVFilter
+
+GENERIC_EPG_FILENAME = "generic_epgs.xml"
+TVG_ID_RE = re.compile(rb'tvg-id="([^"]*)"')
+
+
+def collect_tvg_ids(nginx_dir: Path) -> FrozenSet[str]:
+    """Unique tvg-id set across all written provider M3Us."""
+    tvg_ids = set()
+    for m3u_path in sorted(Path(nginx_dir).glob("*.m3u")):
+        with open(m3u_path, "rb") as f:
+            for line in f:
+                if line.startswith(b"#EXTINF"):
+                    tvg_ids.update(m.decode("utf-8", "replace") for m in TVG_ID_RE.findall(line))
+    tvg_ids.discard("")
+    return frozenset(tvg_ids)
+
+
+class GenericEPG:
+    """Filter + category map across all generic XMLTV sources."""
+    def __init__(self, xml_filter: XMLTVFilter, logger):
+        self.xml_filter = xml_filter
+        self.logger = logger
+
+    def filter_generic(self,
+                       xml_sources: List[Dict[str, str]],
+                       downloads: Dict[str, FetchResult],
+                       nginx_dir: Path,
+                       tvh_xml_dir: Path,
+                       category_map: Dict[str, str]) -> Path:
+        """Filter the downloaded (spooled) sources, write generic_epgs.xml."""
+        tvg_ids = collect_tvg_ids(nginx_dir)
+        output_path = Path(tvh_xml_dir) / GENERIC_EPG_FILENAME
+
+        sources = []
+        for index, row in enumerate(xml_sources):
+            fetched = downloads.get(row.get("url", ""))
+            if fetched is None or fetched.status != "ok":
+                continue  # Failed source: others still participate
+            sources.append((row.get("output_name") or f"source_{index}", fetched.path))
+
+        self.logger.info(
+            "Generic EPG filter start",
+            extra={"step": "generic_epg", "sources": [name for name, _ in sources],
+                   "tvg_ids": len(tvg_ids)},
+        )
+        self.xml_filter.filter_generic(sources, tvg_ids, category_map, output_path)
+        return output_path
@@ -0,0 +1,77 @@
+# src/epg/provider_epg.py
+"""
+ProviderEPG - Per-provider XML pass: #EXTM3U url-tvg → tvh_xml_dir/<provider>.xml.
+
+The M3U stage queues one ProviderEPGSource per written playlist (its url-tvg
+and the tvg-ids actually written); after the loop all guides are downloaded
+through SourceDownloader (health-gated, parallel, spooled) and filtered in
+one XMLTVFilter.filter_providers() pool run. A provider whose guide fails
+to download keeps its previous XML (outline XML source failure handling).
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional
+
+from ..core.downloader import FetchResult, SourceDownloader
+from ..m3u.parser import Record
+from .xml_processor import XMLTVFilter
+
+EPG_HEADER_KEYS = ("url-tvg", "x-tvg-url")
+
+
+@dataclass(frozen=True)
+class ProviderEPGSource:
+    name: str
+    url: str
+    tvg_ids: FrozenSet[str]
+
+
+def provider_epg_source(name: str,
+                        header: Dict[str, str],
+                        records: List[Record]) -> Optional[ProviderEPGSource]:
+    """Guide URL (first of a comma list) + written tvg-ids, or None without url-tvg."""
+    url = next((header[key] for key in EPG_HEADER_KEYS if header.get(key)), "")
+    url = url.split(",", 1)[0].strip()
+    if not url:
+        return None
+    tvg_ids = frozenset(filter(None, (record.attribute("tvg-id") for record in records)))
+    return ProviderEPGSource(name=name, url=url, tvg_ids=tvg_ids)
+
+
+class ProviderEPG:
+    """Download + filter every queued provider guide in one worker-pool run."""
+    def __init__(self, xml_filter: XMLTVFilter, downloader: SourceDownloader, logger):
+        self.xml_filter = xml_filter
+        self.downloader = downloader
+        self.logger = logger
+
+    def filter_providers(self,
+                         sources: List[ProviderEPGSource],
+                         downloads: Dict[str, FetchResult],
+                         tvh_xml_dir: Path,
+                         category_map: Dict[str, str]) -> List[Path]:
+        """downloads: this run's fetch_all() results - guides also in xml_sources are reused."""
+        missing = [{"url": source.url, "output_name": f"{source.name}_epg"}
+                   for source in sources if source.url not in downloads]
+        fetched = {**downloads, **self.downloader.fetch_all(missing)}
+
+        jobs = []
+        for source in sources:
+            result = fetched[source.url]
+            if result.status != "ok":
+                self.logger.error(
+                    "Provider XML skipped - guide download failed",
+                    extra={"step": "provider_epg", "provider": source.name,
+                           "url": source.url, "error": result.error},
+                )
+                continue
+            jobs.append((source.name, result.path, source.tvg_ids,
+                         Path(tvh_xml_dir) / f"{source.name}.xml"))
+
+        self.logger.info(
+            "Provider EPG filter start",
+            extra={"step": "provider_epg", "providers": [job[0] for job in jobs],
+                   "skipped": len(sources) - len(jobs)},
+        )
+        self.xml_filter.filter_providers(jobs, category_map)
+        return [job[3] for job in jobs]
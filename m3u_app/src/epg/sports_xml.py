@@ -0,0 +1,61 @@
+# src/epg/sports_xml.py
+"""
+SportsXML - GameRecords → tvh_xml_dir/sports.xml via XMLTVWriter.
+
+One <channel> per assigned {serviceprefix}.{channelassignment} (several
+games share one in interval lineup mode); one <programme> per game with an
+API time, start/stop = apitime + gameduration in UTC. Games without an API
+match still get their channel but no programme (outline partial-match policy).
+Titles are "AWAY @ HOME": the API match sets team1canonical to the away team
+and team2canonical to the home team (alphabetical only until matched).
+"""
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from ..core.entities import GameRecord
+from ..core.lineup_manager import DEFAULT_GAME_DURATION, tvg_id, tvg_name
+from .xmltv_writer import XMLTVWriter
+
+SPORTS_CATEGORY = "Sports"
+
+
+def game_duration(game: GameRecord) -> timedelta:
+    """LeagueConfig game_duration copied onto the GameRecord (3h if missing)."""
+    duration = game.gameduration or DEFAULT_GAME_DURATION
+    return timedelta(hours=duration.get("hours", 0), minutes=duration.get("minutes", 0))
+
+
+class SportsXML:
+    """Outline SportsXML: write_sports_xml() once per run (match_games() pending api_client)."""
+    def __init__(self, logger):
+        self.logger = logger
+
+    def write_sports_xml(self, games: List[GameRecord], output_path: Path) -> None:
+        assigned = [game for game in games if game.channelassignment]
+        channels: Dict[Tuple[str, int], List[GameRecord]] = {}
+        for game in assigned:
+            channels.setdefault((game.serviceprefix, game.channelassignment), []).append(game)
+
+        with XMLTVWriter(output_path) as xmltv:
+            for key in sorted(channels):
+                xmltv.write_channel(tvg_id(channels[key][0]), [tvg_name(channels[key][0])])
+            for key in sorted(channels):
+                timed = [game for game in channels[key] if game.apitime is not None]
+                for game in sorted(timed, key=lambda g: (g.apitime, g.matchupkey)):
+                    title = f"{game.team1canonical} @ {game.team2canonical}"  # Away @ Home
+                    xmltv.write_programme(
+                        tvg_id(game),
+                        start=game.apitime,
+                        stop=game.apitime + game_duration(game),
+                        title=title,
+                        desc=title,
+                        categories=(SPORTS_CATEGORY, game.league),
+                    )
+
+        self.logger.info(
+            "Sports XMLTV written",
+            extra={"step": "sports_xml", "output": str(output_path),
+                   "channels": xmltv.channels, "programmes": xmltv.programmes,
+                   "unassigned": len(games) - len(assigned)},
+        )
@@ -0,0 +1,264 @@
+# src/epg/xml_processor.py
+"""
+XMLTVFilter - Filter XMLTV sources by tvg-id + category remap + Movie title fix.
+
+Each source is stream-parsed (iterparse) into two fragment files (channels,
+programmes). Sources run in a process pool when settings.xml_workers != 1:
+the work is pure-Python and CPU-bound, so threads would serialize on the GIL.
+The parent concatenates fragments in job order (deterministic output) through
+XMLTVWriter and merges per-source unmapped category counts into DiagnosticCollector.
+"""
+import gzip
+import os
+import tempfile
+import zlib
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Tuple
+
+from ..core.profiler import profiled
+from .xmltv_writer import WRITE_BUFFER, XMLTVWriter, write_element
+
+GZIP_MAGIC = b"\x1f\x8b"
+GENERIC_TITLES = {"Movie"}
+SUBTITLE_TAGS = ("sub-title", "subtitle")
+
+
+@dataclass(frozen=True)
+class XMLFilterJob:
+    """One source for one worker. Must stay picklable (process pool)."""
+    name: str
+    source_path: str
+    tvg_ids: FrozenSet[str]
+    category_map: Dict[str, str]
+    fragment_prefix: str  # "<tmpdir>/<index>" → .channels / .programmes
+    profile_path: str = ""  # Worker writes its own cProfile stats here when set
+
+
+@dataclass
+class XMLFilterResult:
+    """Per-source stats + fragment locations returned to the parent."""
+    name: str
+    channels_path: str = ""
+    programmes_path: str = ""
+    channels_kept: int = 0
+    programmes_kept: int = 0
+    dropped: int = 0
+    titles_fixed: int = 0
+    unmapped_categories: Dict[str, int] = field(default_factory=dict)
+    error: str = ""
+
+
+def _local(tag: str) -> str:
+    """'{ns}channel' → 'channel' (namespace-agnostic tag match)."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _open_source(path: str):
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    return gzip.open(path, "rb") if magic == GZIP_MAGIC else open(path, "rb")
+
+
+def _is_junk(text: str) -> bool:
+    return not any(ch.isalpha() for ch in text)
+
+
+def _remap_categories(programme: ET.Element, category_map: Dict[str, str],
+                      known: FrozenSet[str], unmapped: Dict[str, int]) -> None:
+    """Map category text in place (attributes preserved), drop junk + duplicates."""
+    seen = set()
+    for category in [c for c in programme if _local(c.tag) == "category"]:
+        text = (category.text or "").strip()
+        if _is_junk(text):
+            programme.remove(category)
+            continue
+        if text in category_map:
+            text = category_map[text]
+        elif text not in known:
+            unmapped[text] = unmapped.get(text, 0) + 1
+        key = (text, tuple(sorted(category.attrib.items())))
+        if key in seen:
+            programme.remove(category)
+            continue
+        seen.add(key)
+        category.text = text
+
+
+def _fix_generic_title(programme: ET.Element) -> bool:
+    """<title>Movie</title><sub-title>X</sub-title> → <title>X</title>."""
+    title = next((c for c in programme if _local(c.tag) == "title"), None)
+    if title is None or (title.text or "").strip() not in GENERIC_TITLES:
+        return False
+    subtitle = next((c for c in programme if _local(c.tag) in SUBTITLE_TAGS), None)
+    if subtitle is None or not (subtitle.text or "").strip():
+        return False
+    title.text = subtitle.text.strip()
+    programme.remove(subtitle)
+    return True
+
+
+def filter_source(job: XMLFilterJob) -> XMLFilterResult:
+    """
+    Worker entrypoint: stream one source into channel/programme fragments.
+    Never raises - parse/IO failures are returned in result.error.
+    """
+    with profiled(job.profile_path):
+        return _filter_source(job)
+
+
+def _filter_source(job: XMLFilterJob) -> XMLFilterResult:
+    result = XMLFilterResult(
+        name=job.name,
+        channels_path=f"{job.fragment_prefix}.channels",
+        programmes_path=f"{job.fragment_prefix}.programmes",
+    )
+    known = frozenset(job.category_map.values())
+    try:
+        with _open_source(job.source_path) as source, \
+                open(result.channels_path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as channels_out, \
+                open(result.programmes_path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as programmes_out:
+            root = None
+            depth = 0
+            for event, elem in ET.iterparse(source, events=("start", "end")):
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth != 1:
+                    continue  # Only top-level children of <tv>
+
+                tag = _local(elem.tag)
+                if tag == "channel" and elem.get("id") in job.tvg_ids:
+                    elem.tail = "\n"
+                    write_element(elem, channels_out.write)
+                    result.channels_kept += 1
+                elif tag == "programme" and elem.get("channel") in job.tvg_ids:
+                    _remap_categories(elem, job.category_map, known, result.unmapped_categories)
+                    result.titles_fixed += _fix_generic_title(elem)
+                    elem.tail = "\n"
+                    write_element(elem, programmes_out.write)
+                    result.programmes_kept += 1
+                else:
+                    result.dropped += 1
+                root.clear()  # Release processed children
+    except (ET.ParseError, OSError, EOFError, zlib.error) as e:
+        result.error = str(e)
+    except Exception as e:  # Worker contract: never raise (would abort pool.map)
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+class XMLTVFilter:
+    """
+    Filters XMLTV sources and assembles outputs.
+    filter_generic(): many sources → one file (generic_epgs.xml)
+    filter_providers(): one source → one file per provider (provider.xml)
+    """
+    def __init__(self, workers: int, diagnostics, logger, profiler=None):
+        self.workers = workers
+        self.diagnostics = diagnostics
+        self.logger = logger
+        self.profiler = profiler  # StageProfiler: per-worker pstats when profiling
+
+    def filter_generic(self,
+                       sources: List[Tuple[str, str]],
+                       tvg_ids: FrozenSet[str],
+                       category_map: Dict[str, str],
+                       output_path: Path) -> List[XMLFilterResult]:
+        """sources: [(name, raw_path)] concatenated in the given order."""
+        return self._run({output_path: [(name, path, tvg_ids) for name, path in sources]},
+                         category_map)[output_path]
+
+    def filter_providers(self,
+                         providers: List[Tuple[str, str, FrozenSet[str], Path]],
+                         category_map: Dict[str, str]) -> Dict[Path, List[XMLFilterResult]]:
+        """providers: [(name, raw_path, provider tvg_ids, output_path)]."""
+        return self._run(
+            {output: [(name, path, tvg_ids)] for name, path, tvg_ids, output in providers},
+            category_map,
+        )
+
+    def _run(self,
+             outputs: Dict[Path, List[Tuple[str, str, FrozenSet[str]]]],
+             category_map: Dict[str, str]) -> Dict[Path, List[XMLFilterResult]]:
+        if not outputs:
+            return {}
+        fragment_root = Path(next(iter(outputs))).parent
+        fragment_root.mkdir(parents=True, exist_ok=True)
+
+        with tempfile.TemporaryDirectory(prefix=".xmltv_fragments_", dir=fragment_root) as tmp:
+            jobs: List[Tuple[Path, XMLFilterJob]] = []
+            for output, sources in outputs.items():
+                for name, path, tvg_ids in sources:
+                    prefix = os.path.join(tmp, f"{len(jobs):04d}")
+                    profile_path = (self.profiler.worker_profile_path(f"{len(jobs):04d}_{name}")
+                                    if self.profiler else "")
+                    jobs.append((output, XMLFilterJob(name, path, tvg_ids, category_map,
+                                                      prefix, profile_path)))
+
+            results = self._execute([job for _, job in jobs])
+
+            grouped: Dict[Path, List[XMLFilterResult]] = {output: [] for output in outputs}
+            for (output, _), result in zip(jobs, results):
+                grouped[output].append(result)
+                self._record(result)
+            for output, output_results in grouped.items():
+                self._assemble(Path(output), output_results)
+        return grouped
+
+    def _execute(self, jobs: List[XMLFilterJob]) -> List[XMLFilterResult]:
+        workers = min(self.workers or os.cpu_count() or 1, len(jobs))
+        if workers <= 1:
+            return [filter_source(job) for job in jobs]
+        # map() preserves job order regardless of completion order
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(filter_source, jobs))
+
+    def _record(self, result: XMLFilterResult) -> None:
+        for category, count in result.unmapped_categories.items():
+            self.diagnostics.add_unmapped_category(category, count)
+        if result.error:
+            self.logger.error(
+                "XMLTV source failed",
+                extra={"step": "xml_filter", "source": result.name, "error": result.error},
+            )
+            return
+        self.logger.debug(
+            "XMLTV source filtered",
+            extra={
+                "step": "xml_filter", "source": result.name,
+                "channels_kept": result.channels_kept,
+                "programmes_kept": result.programmes_kept,
+                "dropped": result.dropped, "titles_fixed": result.titles_fixed,
+                "unmapped_categories": len(result.unmapped_categories),
+            },
+        )
+
+    def _assemble(self, output_path: Path, results: List[XMLFilterResult]) -> None:
+        """Channels of every source, then programmes (DTD order)."""
+        if not any(not result.error for result in results):
+            # Outage / every source broken: an empty <tv> would wipe the guide
+            self.logger.error(
+                "XMLTV output not written - no source succeeded, previous file kept",
+                extra={"step": "xml_write", "output": str(output_path),
+                       "sources": [r.name for r in results],
+                       "previous_exists": output_path.exists()},
+            )
+            return
+        with XMLTVWriter(output_path) as xmltv:
+            for kind in ("channels_path", "programmes_path"):
+                for result in results:
+                    if result.error:
+                        continue  # Failed source: skip its partial fragment
+                    xmltv.copy_fragment(getattr(result, kind))
+        self.logger.info(
+            "XMLTV output written",
+            extra={"step": "xml_write", "output": str(output_path),
+                   "bytes": output_path.stat().st_size,
+                   "sources": [r.name for r in results if not r.error]},
+        )
@@ -0,0 +1,182 @@
+# src/epg/xmltv_writer.py
+"""
+XMLTVWriter - Incremental XMLTV output shared by sports.xml, provider.xml
+and generic_epgs.xml.
+
+Declaration, DOCTYPE and <tv> are written up front, then <channel>/<programme>
+elements one at a time into a buffered temp file next to the output; </tv>
+and the atomic rename happen on a clean exit only (an exception leaves the
+previous output in place). Escaping of the strings that repeat on every
+element (channel ids, categories, lang, league names) is cached; titles,
+descriptions and other free text are escaped uncached.
+"""
+import os
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, Optional, TextIO
+
+XMLTV_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<!DOCTYPE tv SYSTEM "xmltv.dtd">\n'
+    '<tv generator-info-name="process_m3u">\n'
+)
+XMLTV_FOOTER = "</tv>\n"
+XMLTV_TIME_FORMAT = "%Y%m%dT%H%M%SZ"  # Outline timezone policy: 20240203T180000Z
+WRITE_BUFFER = 1024 * 1024
+COPY_CHUNK = 1024 * 1024
+ESCAPE_CACHE_SIZE = 16384
+CACHED_TEXT_TAGS = frozenset({"category", "country", "language", "value"})
+CACHED_ATTRIBUTES = frozenset({"id", "channel", "lang", "start", "stop", "system", "type"})
+
+
+def escape_text(text: str) -> str:
+    """Element text/tail (same rules as ElementTree)."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def escape_attr(value: str) -> str:
+    """Attribute value in double quotes (same rules as ElementTree)."""
+    value = escape_text(value)
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    if "\r" in value:
+        value = value.replace("\r", "&#13;")
+    if "\n" in value:
+        value = value.replace("\n", "&#10;")
+    if "\t" in value:
+        value = value.replace("\t", "&#09;")
+    return value
+
+
+# Only for strings that repeat across elements; titles/descs would just churn the cache
+cached_escape_text = lru_cache(maxsize=ESCAPE_CACHE_SIZE)(escape_text)
+cached_escape_attr = lru_cache(maxsize=ESCAPE_CACHE_SIZE)(escape_attr)
+
+
+def format_xmltv_time(value: datetime) -> str:
+    """Aware datetimes are converted to UTC; naive ones are taken as UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime(XMLTV_TIME_FORMAT)
+
+
+def write_element(elem: ET.Element, write: Callable[[str], object]) -> None:
+    """
+    Serialize elem (+ tail) like ET.tostring(); escaping is cached for ids,
+    lang, times and short vocabulary elements (CACHED_*), not free text.
+    Subtrees with namespaced tags/attributes or comments/PIs go through
+    ElementTree so xmlns declarations land exactly where it puts them.
+    """
+    for node in elem.iter():
+        if (not isinstance(node.tag, str) or node.tag[:1] == "{"
+                or any(key[:1] == "{" for key in node.attrib)):
+            write(ET.tostring(elem, encoding="unicode"))
+            return
+    _write_plain(elem, write)
+
+
+def _write_plain(elem: ET.Element, write: Callable[[str], object]) -> None:
+    tag = elem.tag
+    write("<" + tag)
+    for key, value in elem.attrib.items():
+        escaped = cached_escape_attr(value) if key in CACHED_ATTRIBUTES else escape_attr(value)
+        write(f' {key}="{escaped}"')
+    if elem.text or len(elem):
+        write(">")
+        if elem.text:
+            text = elem.text
+            write(cached_escape_text(text) if tag in CACHED_TEXT_TAGS else escape_text(text))
+        for child in elem:
+            _write_plain(child, write)
+        write(f"</{tag}>")
+    else:
+        write(" />")
+    tail = elem.tail
+    if tail:
+        write(tail if tail.isspace() else escape_text(tail))  # Mostly indentation
+
+
+class XMLTVWriter:
+    """
+    Context manager:
+
+        with XMLTVWriter(output_path) as xmltv:
+            xmltv.write_channel("NBA.1", ["NBA 1"])
+            xmltv.write_programme("NBA.1", start, stop, "A vs B", categories=["Sports", "NBA"])
+    """
+    def __init__(self, output_path: Path):
+        self.output_path = Path(output_path)
+        self.tmp_path = self.output_path.with_suffix(self.output_path.suffix + ".tmp")
+        self.channels = 0
+        self.programmes = 0
+        self._out: Optional[TextIO] = None
+
+    def __enter__(self) -> "XMLTVWriter":
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._out = open(self.tmp_path, "w", encoding="utf-8", newline="\n", buffering=WRITE_BUFFER)
+        self._out.write(XMLTV_HEADER)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self._out.write(XMLTV_FOOTER)
+            self._out.close()
+            if exc_type is None:
+                os.replace(self.tmp_path, self.output_path)
+        finally:
+            if exc_type is not None and self.tmp_path.exists():
+                self.tmp_path.unlink()
+
+    def write_channel(self,
+                      channel_id: str,
+                      display_names: Iterable[str],
+                      icon: Optional[str] = None) -> None:
+        out = self._out
+        out.write(f'  <channel id="{cached_escape_attr(channel_id)}">\n')
+        for name in display_names:
+            out.write(f"    <display-name>{escape_text(name)}</display-name>\n")
+        if icon:
+            out.write(f'    <icon src="{escape_attr(icon)}" />\n')
+        out.write("  </channel>\n")
+        self.channels += 1
+
+    def write_programme(self,
+                        channel_id: str,
+                        start: datetime,
+                        stop: datetime,
+                        title: str,
+                        desc: Optional[str] = None,
+                        categories: Iterable[str] = (),
+                        lang: str = "en") -> None:
+        out = self._out
+        lang_attr = cached_escape_attr(lang)
+        out.write(
+            f'  <programme start="{format_xmltv_time(start)}" stop="{format_xmltv_time(stop)}"'
+            f' channel="{cached_escape_attr(channel_id)}">\n'
+        )
+        out.write(f'    <title lang="{lang_attr}">{escape_text(title)}</title>\n')
+        if desc:
+            out.write(f'    <desc lang="{lang_attr}">{escape_text(desc)}</desc>\n')
+        for category in categories:
+            out.write(f'    <category lang="{lang_attr}">{cached_escape_text(category)}</category>\n')
+        out.write("  </programme>\n")
+        self.programmes += 1
+
+    def write_element(self, elem: ET.Element) -> None:
+        """Already-built <channel>/<programme> element (filter paths)."""
+        write_element(elem, self._out.write)
+
+    def copy_fragment(self, path: str) -> None:
+        """Append a fragment file of serialized elements (worker output)."""
+        with open(path, encoding="utf-8") as fragment:
+            while chunk := fragment.read(COPY_CHUNK):
+                self._out.write(chunk)
@@ -0,0 +1,238 @@
+# src/m3u/parser.py
+"""
+M3UParser - Raw provider M3U (bytes) → ChannelRecords.
+Every #EXTINF starts a record; following EXT* lines are kept verbatim in
+rawtags and every non-comment line is a stream URL of that record.
+
+Lazy mode (settings.lazy_m3u_records) → LazyChannelRecords: the original
+line bytes are kept and only decoded on first access, so records nobody
+changed are written back byte-for-byte.
+"""
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+from ..core.entities import ChannelRecord
+
+ATTRIBUTE_RE = re.compile(r'([A-Za-z0-9_-]+)="([^"]*)"')
+EXTINF = "#EXTINF"
+LAZY_ATTRIBUTES = ("tvg-name", "group-title", "tvg-id")  # What processing reads
+_NAME_BYTES = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-")
+
+
+def parse_extinf(line: str) -> Tuple[str, Dict[str, str], str]:
+    """'#EXTINF:-1 tvg-id="x" group-title="y",Name' → ("-1", attrs, "Name")."""
+    body = line[len(EXTINF) + 1:]
+    head, _, _ = body.partition(" ")
+    duration = head.split(",", 1)[0]
+
+    attributes: Dict[str, str] = {}
+    end = 0
+    for match in ATTRIBUTE_RE.finditer(body):
+        attributes[match.group(1)] = match.group(2)
+        end = match.end()
+    comma = body.find(",", end if attributes else len(duration))
+    display_name = body[comma + 1:].strip() if comma != -1 else ""
+    return duration, attributes, display_name
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", "replace")
+
+
+def find_attribute(line: bytes, name: str) -> Optional[bytes]:
+    """Raw value of the last name="..." in line (parse_extinf() semantics), else None."""
+    key = name.encode() + b'="'
+    end = len(line)
+    while True:
+        start = line.rfind(key, 0, end)
+        if start == -1:
+            return None
+        if start == 0 or line[start - 1] not in _NAME_BYTES:
+            value_start = start + len(key)
+            value_end = line.find(b'"', value_start)
+            return line[value_start:value_end] if value_end != -1 else None
+        end = start + len(key) - 1  # Suffix of a longer name (e.g. x-tvg-id): keep looking
+
+
+class LazyChannelRecord:
+    """
+    ChannelRecord over the original provider line bytes.
+
+    attribute() decodes only the LAZY_ATTRIBUTES on first access (cached).
+    rawtags/attributes/displayname/urls decode in full on first access and
+    are snapshotted; the writer re-serializes only what differs from the
+    snapshot (in-place dict/list edits included), else writes the bytes.
+    """
+    __slots__ = ("extinf", "tagbytes", "urlbytes", "_fields", "_full", "_snapshot", "_urls", "_urlsnapshot")
+
+    def __init__(self, extinf: bytes):
+        self.extinf = extinf                  # Original #EXTINF line, no line ending
+        self.tagbytes: List[bytes] = []       # Following EXT* lines
+        self.urlbytes: List[bytes] = []
+        self._fields: Dict[str, Optional[str]] = {}
+        self._full: Optional[list] = None     # [rawtags, attributes, displayname]
+        self._snapshot: Optional[tuple] = None
+        self._urls: Optional[List[str]] = None
+        self._urlsnapshot: Optional[Tuple[str, ...]] = None
+
+    def attribute(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Single attribute without decoding the rest of the line."""
+        if self._full is not None:
+            return self._full[1].get(name, default)
+        if name not in LAZY_ATTRIBUTES:
+            return self.attributes.get(name, default)
+        try:
+            value = self._fields[name]
+        except KeyError:
+            raw = find_attribute(self.extinf, name)
+            value = self._fields[name] = _decode(raw) if raw is not None else None
+        return default if value is None else value
+
+    def set_attribute(self, name: str, value: str) -> None:
+        self.attributes[name] = value
+
+    @property
+    def rawtags(self) -> List[Dict[str, str]]:
+        return self._materialize()[0]
+
+    @rawtags.setter
+    def rawtags(self, value: List[Dict[str, str]]) -> None:
+        self._materialize()[0] = value
+
+    @property
+    def attributes(self) -> Dict[str, str]:
+        return self._materialize()[1]
+
+    @attributes.setter
+    def attributes(self, value: Dict[str, str]) -> None:
+        self._materialize()[1] = value
+
+    @property
+    def displayname(self) -> str:
+        return self._materialize()[2]
+
+    @displayname.setter
+    def displayname(self, value: str) -> None:
+        self._materialize()[2] = value
+
+    @property
+    def urls(self) -> List[str]:
+        if self._urls is None:
+            self._snapshot_urls()
+        return self._urls
+
+    @urls.setter
+    def urls(self, value: List[str]) -> None:
+        if self._urls is None:
+            self._snapshot_urls()  # So the change is detected against the original
+        self._urls = value
+
+    @property
+    def tags_modified(self) -> bool:
+        """rawtags/attributes/displayname differ from the original line bytes."""
+        return self._full is not None and self._freeze() != self._snapshot
+
+    @property
+    def urls_modified(self) -> bool:
+        return self._urls is not None and tuple(self._urls) != self._urlsnapshot
+
+    def _materialize(self) -> list:
+        if self._full is None:
+            duration, attributes, display_name = parse_extinf(_decode(self.extinf))
+            rawtags = [{"tag": EXTINF, "duration": duration}]
+            for raw in self.tagbytes:
+                line = _decode(raw)
+                rawtags.append({"tag": line.split(":", 1)[0], "line": line})
+            self._full = [rawtags, attributes, display_name]
+            self._snapshot = self._freeze()
+        return self._full
+
+    def _snapshot_urls(self) -> None:
+        self._urls = [_decode(url) for url in self.urlbytes]
+        self._urlsnapshot = tuple(self._urls)
+
+    def _freeze(self) -> tuple:
+        rawtags, attributes, display_name = self._full
+        return (tuple(tuple(tag.items()) for tag in rawtags), tuple(attributes.items()), display_name)
+
+
+Record = Union[ChannelRecord, LazyChannelRecord]
+
+
+class M3UParser:
+    """Outline M3UParser: parse_m3u() per provider download."""
+    def __init__(self, logger, lazy: bool = False):
+        self.logger = logger
+        self.lazy = lazy
+
+    def parse_m3u(self, data: bytes, provider: str = "") -> Tuple[Dict[str, str], List[Record]]:
+        """Returns: (#EXTM3U header attributes e.g. url-tvg, records)."""
+        if self.lazy:
+            return self._parse_lazy(data, provider)
+        header: Dict[str, str] = {}
+        records: List[ChannelRecord] = []
+        current: ChannelRecord = None
+        line_count = 0
+        url_count = 0
+
+        for raw_line in data.decode("utf-8", "replace").splitlines():
+            line = raw_line.strip()
+            if not line:
+                continue
+            line_count += 1
+            if line.startswith("#EXTM3U"):
+                header.update(ATTRIBUTE_RE.findall(line))
+            elif line.startswith(EXTINF):
+                duration, attributes, display_name = parse_extinf(line)
+                current = ChannelRecord(
+                    rawtags=[{"tag": EXTINF, "duration": duration}],
+                    attributes=attributes,
+                    displayname=display_name,
+                )
+                records.append(current)
+            elif line.startswith("#"):
+                if current is not None:
+                    current.rawtags.append({"tag": line.split(":", 1)[0], "line": line})
+            elif current is not None:
+                current.urls.append(line)
+                url_count += 1
+
+        records = [record for record in records if record.urls]
+        self._log_parsed(provider, line_count, len(records), url_count)
+        return header, records
+
+    def _parse_lazy(self, data: bytes, provider: str) -> Tuple[Dict[str, str], List[LazyChannelRecord]]:
+        """Same line rules as parse_m3u(), but on bytes without decoding."""
+        header: Dict[str, str] = {}
+        records: List[LazyChannelRecord] = []
+        current: LazyChannelRecord = None
+        line_count = 0
+        url_count = 0
+
+        for raw_line in data.splitlines():
+            line = raw_line.strip()
+            if not line:
+                continue
+            line_count += 1
+            if line.startswith(b"#EXTM3U"):
+                header.update(ATTRIBUTE_RE.findall(_decode(line)))
+            elif line.startswith(b"#EXTINF"):
+                current = LazyChannelRecord(line)
+                records.append(current)
+            elif line.startswith(b"#"):
+                if current is not None:
+                    current.tagbytes.append(line)
+            elif current is not None:
+                current.urlbytes.append(line)
+                url_count += 1
+
+        records = [record for record in records if record.urlbytes]
+        self._log_parsed(provider, line_count, len(records), url_count)
+        return header, records
+
+    def _log_parsed(self, provider: str, line_count: int, extinf_count: int, url_count: int) -> None:
+        self.logger.debug(
+            "M3U parsed",
+            extra={"step": "parse", "provider": provider, "lines": line_count,
+                   "extinf": extinf_count, "urls": url_count, "lazy": self.lazy},
+        )
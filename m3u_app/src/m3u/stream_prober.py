@@ -0,0 +1,252 @@
+# src/m3u/stream_prober.py
+"""
+StreamProber - Concurrent liveness check of ChannelRecord.urls.
+
+- HEAD per URL, falling back to a small ranged GET when HEAD is refused
+- One keep-alive connection per (host, batch); at most
+  stream_probe_connections open at once, all inside a time budget
+- Results cached per URL in state/stream_probe.json for stream_probe_ttl_hours,
+  so each cron run only re-probes stale entries
+- Only a definitive HTTP 4xx marks a URL dead; timeouts, connection errors
+  and 5xx are "unknown" (kept in place, cached for TRANSIENT_TTL_S only)
+- Dead URLs are reordered behind live fallbacks ("reorder") or removed
+  ("prune"; a record with no live URL left is dropped)
+"""
+import http.client
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from ..core.config_loader import ConfigSettings
+from ..core.entities import ChannelRecord
+
+LIVE = "live"
+DEAD = "dead"
+UNKNOWN = "unknown"  # Not probed (budget/scheme) or transient failure (transport error, 5xx)
+TRANSIENT_TTL_S = 15 * 60
+RANGE_BYTES = 1024
+BATCH_SIZE = 32       # URLs probed back-to-back on one connection
+HEAD_REFUSED = {400, 403, 405, 501}
+USER_AGENT = "m3uprocessor/1.0"
+TARGET_SAFE = "/%?&=+:;@!$'()*,~[]"  # Already-encoded and reserved characters kept as-is
+
+HostKey = Tuple[str, str, int]  # (scheme, host, port)
+
+
+@dataclass
+class ProbeResult:
+    state: str        # LIVE | DEAD | UNKNOWN
+    status: str       # HTTP status code or error class
+    checked: float    # epoch seconds
+
+
+def _status_state(status: int) -> str:
+    """2xx/3xx live, 4xx dead (definitive), 5xx unknown (server-side, may recover)."""
+    if status < 400:
+        return LIVE
+    return DEAD if status < 500 else UNKNOWN
+
+
+@dataclass
+class ProbeCache:
+    """JSON-backed url → ProbeResult cache with TTL."""
+    path: Path
+    ttl_s: float
+    entries: Dict[str, ProbeResult] = field(default_factory=dict)
+
+    def load(self) -> "ProbeCache":
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            now = time.time()
+            self.entries = {
+                url: result for url, result in
+                ((url, ProbeResult(**entry)) for url, entry in data.items())
+                if now - result.checked < self._ttl(result)
+            }
+        except (FileNotFoundError, json.JSONDecodeError, TypeError, KeyError):
+            self.entries = {}
+        return self
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({url: asdict(r) for url, r in self.entries.items()}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def fresh(self, url: str) -> Optional[ProbeResult]:
+        result = self.entries.get(url)
+        if result is not None and time.time() - result.checked < self._ttl(result):
+            return result
+        return None
+
+    def _ttl(self, result: ProbeResult) -> float:
+        """Transient outcomes are retried soon instead of sticking for the full TTL."""
+        return self.ttl_s if result.state != UNKNOWN else min(self.ttl_s, TRANSIENT_TTL_S)
+
+
+@dataclass
+class LivenessStats:
+    """Per-provider liveness counters for diagnostics."""
+    records: int = 0
+    urls: int = 0
+    cached: int = 0
+    probed: int = 0
+    live: int = 0
+    dead: int = 0
+    unknown: int = 0
+    urls_pruned: int = 0
+    records_reordered: int = 0
+    records_dropped: int = 0
+    elapsed_ms: int = 0
+
+
+class StreamProber:
+    """Probe, cache and apply liveness to one provider's records at a time."""
+    def __init__(self, settings: ConfigSettings, cache: ProbeCache, logger):
+        self.settings = settings
+        self.cache = cache
+        self.logger = logger
+
+    def probe_records(self,
+                      records: List[ChannelRecord],
+                      provider: str,
+                      budget_s: float) -> Tuple[List[ChannelRecord], LivenessStats]:
+        """Probe stale URLs within budget_s, then reorder/prune. Returns (records, stats)."""
+        started = time.monotonic()
+        stats = LivenessStats(records=len(records))
+
+        urls = list(dict.fromkeys(url for record in records for url in record.urls))
+        stats.urls = len(urls)
+        stale = [url for url in urls if self.cache.fresh(url) is None]
+        stats.cached = stats.urls - len(stale)
+
+        probed = self._probe_all(stale, deadline=started + budget_s)
+        self.cache.entries.update(probed)
+        stats.probed = len(probed)
+
+        states = {url: self._state(url) for url in urls}
+        for state in states.values():
+            setattr(stats, state, getattr(stats, state) + 1)
+
+        kept = [record for record in records if self._apply(record, states, stats)]
+        stats.records_dropped = len(records) - len(kept)
+        stats.elapsed_ms = int((time.monotonic() - started) * 1000)
+
+        self.logger.info(
+            "Stream liveness applied",
+            extra={"step": "stream_probe", "provider": provider, **asdict(stats)},
+        )
+        return kept, stats
+
+    def _state(self, url: str) -> str:
+        result = self.cache.fresh(url)
+        return UNKNOWN if result is None else result.state
+
+    def _apply(self, record: ChannelRecord, states: Dict[str, str], stats: LivenessStats) -> bool:
+        """Dead URLs behind live/unknown ones (stable), or removed when pruning."""
+        dead = [url for url in record.urls if states[url] == DEAD]
+        if not dead:
+            return True
+        alive = [url for url in record.urls if states[url] != DEAD]
+        if self.settings.stream_probe_mode == "prune":
+            stats.urls_pruned += len(dead)
+            record.urls = alive
+            return bool(alive)
+        if record.urls != alive + dead:
+            record.urls = alive + dead
+            stats.records_reordered += 1
+        return True
+
+    def _probe_all(self, urls: List[str], deadline: float) -> Dict[str, ProbeResult]:
+        """Batches grouped by host; each batch reuses one connection."""
+        by_host: Dict[HostKey, List[str]] = {}
+        results: Dict[str, ProbeResult] = {}
+        for url in urls:
+            try:
+                parts = urlsplit(url)
+                if parts.scheme not in ("http", "https") or not parts.hostname:
+                    continue
+                port = parts.port or (443 if parts.scheme == "https" else 80)
+            except ValueError as e:  # Bad port / IPv6 literal in provider data
+                results[url] = ProbeResult(UNKNOWN, type(e).__name__, time.time())
+                continue
+            by_host.setdefault((parts.scheme, parts.hostname, port), []).append(url)
+
+        batches = [
+            (host, host_urls[i:i + BATCH_SIZE])
+            for host, host_urls in sorted(by_host.items())
+            for i in range(0, len(host_urls), BATCH_SIZE)
+        ]
+        if not batches:
+            return results
+
+        workers = max(1, min(self.settings.stream_probe_connections, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe") as pool:
+            for batch_result in pool.map(lambda b: self._probe_batch(*b, deadline), batches):
+                results.update(batch_result)
+        return results
+
+    def _probe_batch(self, host: HostKey, urls: List[str], deadline: float) -> Dict[str, ProbeResult]:
+        scheme, hostname, port = host
+        timeout = self.settings.stream_probe_timeout_s
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        connection = None
+        results: Dict[str, ProbeResult] = {}
+        try:
+            for url in urls:
+                if time.monotonic() >= deadline:
+                    break  # Budget spent: remaining URLs stay unknown, probed next run
+                if connection is None:
+                    connection = connection_class(hostname, port, timeout=timeout)
+                    try:
+                        connection.connect()
+                    except (OSError, ValueError) as e:  # ValueError: IDNA-unencodable host
+                        # Host unreachable: the rest of this batch stays unknown
+                        # (transport error, not evidence the streams are gone)
+                        checked = time.time()
+                        for pending in urls[urls.index(url):]:
+                            results[pending] = ProbeResult(UNKNOWN, type(e).__name__, checked)
+                        break
+                state, status, reusable = self._probe_one(connection, url)
+                results[url] = ProbeResult(state=state, status=status, checked=time.time())
+                if not reusable:
+                    connection.close()
+                    connection = None
+        finally:
+            if connection is not None:
+                connection.close()
+        return results
+
+    def _probe_one(self, connection: http.client.HTTPConnection, url: str) -> Tuple[str, str, bool]:
+        """Returns: (state, status, connection reusable)."""
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        target = quote(target, safe=TARGET_SAFE)  # Non-ASCII paths as UTF-8 %XX
+        headers = {"User-Agent": USER_AGENT}
+        try:
+            connection.request("HEAD", target, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status not in HEAD_REFUSED:
+                return _status_state(response.status), str(response.status), not response.will_close
+
+            connection.request("GET", target, headers={**headers, "Range": f"bytes=0-{RANGE_BYTES - 1}"})
+            response = connection.getresponse()
+            response.read(RANGE_BYTES)
+            # Unread body remaining → the connection cannot be reused
+            reusable = not response.will_close and response.isclosed()
+            if not reusable:
+                response.close()
+            return _status_state(response.status), str(response.status), reusable
+        except (http.client.HTTPException, OSError, ValueError) as e:
+            # ValueError/UnicodeError: a URL http.client refuses (control chars etc.)
+            return UNKNOWN, type(e).__name__, False
@@ -0,0 +1,112 @@
+# src/m3u/writer.py
+"""
+M3UWriter - ChannelRecords → provider.m3u in nginx_dir (atomic tmp → rename).
+Unmodified LazyChannelRecords are copied as their original bytes.
+"""
+import os
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Tuple
+
+from ..core.entities import GameRecord
+from ..core.lineup_manager import apply_gamerecord_attributes
+from .parser import EXTINF, LazyChannelRecord, Record
+
+WRITE_BUFFER = 1024 * 1024
+GAME_LEAGUE_ATTRIBUTE = "_league"  # Set by ChannelProcessor on sports records
+GAME_KEY_ATTRIBUTE = "_matchupkey"
+
+
+def format_extinf(duration: str, attributes: Dict[str, str], display_name: str) -> str:
+    """Inverse of parse_extinf(); internal "_"-prefixed attributes are not written."""
+    attrs = "".join(
+        f' {key}="{value}"' for key, value in attributes.items() if not key.startswith("_")
+    )
+    return f"{EXTINF}:{duration}{attrs},{display_name}"
+
+
+def is_sports_record(record: Record) -> bool:
+    """Tagged _league by ChannelProcessor (an untouched lazy record never is)."""
+    if isinstance(record, LazyChannelRecord) and not record.tags_modified:
+        return False
+    return record.attribute(GAME_LEAGUE_ATTRIBUTE) is not None
+
+
+def restamp_sports_channels(records: List[Record],
+                            games: Dict[Tuple[str, str], GameRecord]) -> int:
+    """
+    Interval lineups: point sports channels (tvg-id, tvg-name, display name)
+    at their packed channel before writing.
+    ChannelProcessor tags sports records with _league/_matchupkey (internal,
+    never written); games is keyed (league, matchupkey). Returns records changed.
+    """
+    changed = 0
+    for record in records:
+        if not is_sports_record(record):
+            continue
+        game = games.get((record.attribute(GAME_LEAGUE_ATTRIBUTE),
+                          record.attribute(GAME_KEY_ATTRIBUTE)))
+        if game is not None and apply_gamerecord_attributes(record, game):
+            changed += 1
+    return changed
+
+
+class M3UWriter:
+    """Outline M3UWriter: write_provider_m3u() once per provider."""
+    def __init__(self, logger):
+        self.logger = logger
+
+    def write_provider_m3u(self,
+                           records: List[Record],
+                           header: Dict[str, str],
+                           output_path: Path) -> None:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+
+        passthrough = 0
+        with open(tmp_path, "wb", buffering=WRITE_BUFFER) as f:
+            header_line = "#EXTM3U" + "".join(f' {k}="{v}"' for k, v in header.items())
+            f.write(header_line.encode("utf-8") + b"\n")
+            for record in records:
+                if isinstance(record, LazyChannelRecord):
+                    passthrough += self._write_lazy(f, record)
+                else:
+                    self._write_tags(f, record)
+                    for url in record.urls:
+                        f.write(url.encode("utf-8") + b"\n")
+        os.replace(tmp_path, output_path)
+
+        self.logger.debug(
+            "Provider M3U written",
+            extra={"step": "m3u_write", "output": str(output_path),
+                   "channels": len(records), "passthrough": passthrough,
+                   "bytes": output_path.stat().st_size},
+        )
+
+    @staticmethod
+    def _write_tags(f: BinaryIO, record: Record) -> None:
+        for tag in record.rawtags:
+            if tag["tag"] == EXTINF:
+                line = format_extinf(tag["duration"], record.attributes, record.displayname)
+            else:
+                line = tag["line"]
+            f.write(line.encode("utf-8") + b"\n")
+
+    def _write_lazy(self, f: BinaryIO, record: LazyChannelRecord) -> int:
+        """Original bytes for whatever was not changed. Returns: 1 if fully untouched."""
+        tags_modified = record.tags_modified
+        if tags_modified:
+            self._write_tags(f, record)
+        else:
+            f.write(record.extinf + b"\n")
+            for raw in record.tagbytes:
+                f.write(raw + b"\n")
+
+        urls_modified = record.urls_modified
+        if urls_modified:
+            for url in record.urls:
+                f.write(url.encode("utf-8") + b"\n")
+        else:
+            for raw in record.urlbytes:
+                f.write(raw + b"\n")
+        return int(not tags_modified and not urls_modified)
@@ -3,20 +3,52 @@
 Main cron entrypoint. Initializes RunManager + core modules.
 Phase 2+ business logic to be added here.
 """
+import argparse
 import sys
 import os
+import tempfile
+import time
+from dataclasses import asdict
 from pathlib import Path
 from datetime import datetime
+from typing import List, Optional
 
 from .core.runmanager import RunManager, RunContext, ConfigError
 from .core.diagnostic_collector import DiagnosticCollector
-from .core.lineup_manager import SportsLineupManager
+from .core.lineup_manager import SportsLineupManager, INTERVAL
 from .core.sports_lookups import build_sports_lookups
 from .core.entities import SportsLookups
+from .core.source_health import SourceHealthStore
+from .core.downloader import SourceDownloader
+from .core.profiler import StageProfiler
+from .m3u.parser import M3UParser
+from .m3u.writer import M3UWriter, is_sports_record, restamp_sports_channels
+from .m3u.stream_prober import ProbeCache, StreamProber
+from .epg.xml_processor import XMLTVFilter
+from .epg.generic_epg import GenericEPG
+from .epg.provider_epg import ProviderEPG, provider_epg_source
+from .epg.sports_xml import SportsXML
 
+HEALTH_STATE_FILE = Path("state") / "source_health.json"
+PROBE_CACHE_FILE = Path("state") / "stream_probe.json"
+DOWNLOAD_SPOOL_DIR = Path("state") / "downloads"  # One temp dir per run, removed at shutdown
 
-def main() -> int:
-    base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m src.orchestrator")
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="cProfile + tracemalloc every stage into {run}/profile/ "
+             "(same as settings.json \"profile\": true)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None, base_dir: Optional[Path] = None) -> int:
+    """base_dir: app root holding config/ (default: this checkout; load tests override)."""
+    args = parse_args(argv)
+    if base_dir is None:
+        base_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     manager = RunManager(base_dir)
 
     try:
@@ -30,34 +62,188 @@ def main() -> int:
         "Orchestrator startup complete - Phase 1 core ready",
         extra={"step": "startup", "run_id": ctx.run_id},
     )
+
+    config = ctx.config_loader
+    profiler = StageProfiler(
+        run_root=ctx.log_dir,
+        enabled=args.profile or config.settings.profile,
+        top_n=config.settings.profile_top_n,
+        logger=main_logger,
+    )
     
     # ===== PHASE 1 CORE MODULES INITIALIZED =====
     diagnostics = DiagnosticCollector(
-        base_dir=Path(ctx.config.paths.log_dir) / ctx.date_folder,
-        run_id=ctx.run_id
+        base_dir=Path(config.paths.log_dir) / ctx.date_folder,
+        run_id=ctx.run_id,
+        max_entries=config.settings.diagnostics_max_entries,
+        sample_size=config.settings.diagnostics_sample_size,
+        flush_interval_s=config.settings.diagnostics_flush_interval_s,
     )
     
     # Build immutable lookups from sports_config.json
-    lookups: SportsLookups = build_sports_lookups(ctx.config.sports_config)
+    with profiler.stage("core_init"):
+        lookups: SportsLookups = build_sports_lookups(config.sports_config)
     
-    # League managers dict (populated during M3U processing)
-    managers = {}  # league_key → SportsLineupManager
+    # One manager per league (settings.lineup_mode); games fed by ChannelProcessor
+    managers = {  # league_key → SportsLineupManager
+        league_key: SportsLineupManager(
+            league_key, league.serviceprefix, mode=config.settings.lineup_mode
+        )
+        for league_key, league in lookups.leagues.items()
+    }
+    league_games = {}  # league_key → List[GameRecord], for interval packing
     
     main_logger.info(
         "Core modules initialized",
         extra={
             "step": "core_init",
             "leagues": list(lookups.leagues.keys()),
-            "total_teams": len(lookups.team_index),
+            "total_teams": len(lookups.teamindex),
             "diagnostics": "ready"
         }
     )
     
-    # ===== PHASE 2+ BUSINESS LOGIC HERE =====
-    # for provider in ctx.config.m3u_sources:
-    #     process_provider(provider, ctx, diagnostics, lookups, managers)
-    # 
-    # diagnostics.dump_all()
+    # ===== SOURCE DOWNLOADS (health-gated, parallel, bodies spooled to disk) =====
+    (base_dir / DOWNLOAD_SPOOL_DIR).mkdir(parents=True, exist_ok=True)
+    spool = tempfile.TemporaryDirectory(prefix=f"{ctx.run_id}_", dir=base_dir / DOWNLOAD_SPOOL_DIR)
+    with profiler.stage("download"):
+        health = SourceHealthStore(base_dir / HEALTH_STATE_FILE, config.settings).load()
+        downloader = SourceDownloader(config.settings, health, Path(spool.name), main_logger, profiler)
+        downloads = downloader.fetch_all(config.m3u_sources + config.xml_sources)
+        health.save()
+        diagnostics.add_source_health(health.summary())
+        diagnostics.flush()
+
+    main_logger.info(
+        "Source downloads complete",
+        extra={
+            "step": "download",
+            "ok": sum(r.status == "ok" for r in downloads.values()),
+            "failed": sum(r.status == "failed" for r in downloads.values()),
+            "skipped": sum(r.status == "skipped" for r in downloads.values()),
+        }
+    )
+
+    # ===== PER-PROVIDER M3U: parse → (ChannelProcessor) → probe → write =====
+    # Without ChannelProcessor (exclusions/renames/sports) the playlists are raw
+    # provider copies: only publish them (and the EPG derived from them) on opt-in
+    publish = config.settings.publish_outputs
+    if not publish:
+        main_logger.warning(
+            "Publishing disabled (settings.publish_outputs=false) - "
+            "nginx_dir/tvh_xml_dir left untouched",
+            extra={"step": "publish", "nginx_dir": config.paths.nginx_dir,
+                   "tvh_xml_dir": config.paths.tvh_xml_dir},
+        )
+    processor_logger = ctx.loggers["processor"]
+    parser = M3UParser(processor_logger, lazy=config.settings.lazy_m3u_records)
+    writer = M3UWriter(processor_logger)
+    prober = None
+    if config.settings.stream_probe_enabled:
+        probe_cache = ProbeCache(
+            base_dir / PROBE_CACHE_FILE, config.settings.stream_probe_ttl_hours * 3600
+        ).load()
+        prober = StreamProber(config.settings, probe_cache, processor_logger)
+
+    # Interval lineups renumber sports channels once every provider's games are
+    # known: playlists with sports channels are held and written after packing,
+    # the rest per provider as in sequential mode
+    interval = config.settings.lineup_mode == INTERVAL
+    pending = []  # (name, header, records) with sports channels, written after packing
+    provider_epgs = []  # ProviderEPGSource per written playlist with a url-tvg
+    with profiler.stage("m3u_providers"):
+        probe_deadline = time.monotonic() + config.settings.stream_probe_budget_s
+        for index, provider in enumerate(config.m3u_sources):
+            name = provider.get("output_name", "")
+            fetched = downloads.get(provider.get("url", ""))
+            if not name or fetched is None or fetched.status != "ok":
+                continue  # Failed/skipped provider: already logged by the downloader
+
+            header, records = parser.parse_m3u(Path(fetched.path).read_bytes(), name)
+            # ChannelProcessor (rename/cleanup/exclude/sports) slots in here
+
+            if prober is not None:
+                # Remaining run budget split evenly across remaining providers
+                remaining = len(config.m3u_sources) - index
+                budget_s = max(0.0, probe_deadline - time.monotonic()) / remaining
+                records, stats = prober.probe_records(records, name, budget_s)
+                diagnostics.add_stream_liveness(name, asdict(stats))
+
+            if interval and any(is_sports_record(record) for record in records):
+                pending.append((name, header, records))
+            elif publish:
+                writer.write_provider_m3u(records, header, Path(config.paths.nginx_dir) / f"{name}.m3u")
+                provider_epgs.append(provider_epg_source(name, header, records))
+            del records  # Memory isolation between providers (held ones excepted)
+
+        if prober is not None:
+            prober.cache.save()
+
+    # ===== LINEUPS: optional time-aware packing once API times are known =====
+    with profiler.stage("sports_lineups"):
+        for league_key, manager in sorted(managers.items()):
+            if manager.mode == INTERVAL:
+                manager.pack_by_time(league_games.get(league_key, []))
+            diagnostics.add_lineup_summary(league_key, manager.get_lineup_summary())
+
+    # ===== DEFERRED M3U WRITE: sports channels follow the packed numbers =====
+    if pending:
+        with profiler.stage("m3u_write"):
+            games_by_key = {
+                (game.league, game.matchupkey): game
+                for games in league_games.values() for game in games
+            }
+            for name, header, records in pending:
+                restamped = restamp_sports_channels(records, games_by_key)
+                if publish:
+                    writer.write_provider_m3u(records, header, Path(config.paths.nginx_dir) / f"{name}.m3u")
+                    provider_epgs.append(provider_epg_source(name, header, records))
+                main_logger.info(
+                    "Sports channels restamped after packing",
+                    extra={"step": "m3u_write", "provider": name, "restamped": restamped},
+                )
+            pending.clear()
+
+    xml_filter = XMLTVFilter(
+        config.settings.xml_workers, diagnostics, ctx.loggers["xml_filter"], profiler
+    )
+
+    # ===== PROVIDER EPG (#EXTM3U url-tvg → <provider>.xml, one pool run) =====
+    provider_epgs = [source for source in provider_epgs if source is not None]
+    if provider_epgs:
+        with profiler.stage("provider_epg"):
+            ProviderEPG(xml_filter, downloader, ctx.loggers["xml_filter"]).filter_providers(
+                provider_epgs, downloads,
+                tvh_xml_dir=Path(config.paths.tvh_xml_dir),
+                category_map=config.category_map,
+            )
+            health.save()
+
+    # ===== GENERIC EPG (tvg-ids from nginx_dir/*.m3u) =====
+    if publish:
+        with profiler.stage("generic_epg"):
+            GenericEPG(xml_filter, ctx.loggers["xml_filter"]).filter_generic(
+                config.xml_sources, downloads,
+                nginx_dir=Path(config.paths.nginx_dir),
+                tvh_xml_dir=Path(config.paths.tvh_xml_dir),
+                category_map=config.category_map,
+            )
+
+    # ===== SPORTS XML (streamed; programmes only for games with an API time) =====
+    if publish and any(league_games.values()):
+        with profiler.stage("sports_xml"):
+            SportsXML(main_logger).write_sports_xml(
+                [game for games in league_games.values() for game in games],
+                Path(config.paths.tvh_xml_dir) / "sports.xml",
+            )
+
+    with profiler.stage("diagnostics_dump"):
+        diagnostics.dump_all()
+
+    spool.cleanup()
+
+    if ctx.retention is not None:
+        ctx.retention.wait()
     
     main_logger.info(
         "Orchestrator shutdown - Phase 1 test complete", 
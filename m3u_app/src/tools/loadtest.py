@@ -0,0 +1,189 @@
+# src/tools/loadtest.py
+"""
+End-to-end load test: full orchestrator.main() against a local stand-in.
+
+    cd /opt/m3u_app && python3 -m src.tools.loadtest --channels 5000 --latency-ms 50
+
+Generates a throwaway app dir (config/ tree pointing at StandInServer,
+logs/, web/, xml/), runs the pipeline in-process and prints a JSON report:
+wall time, per-stage timings (step="stage" main log entries), peak RSS and
+output file sizes.
+
+The stand-in runs in its own process (StandInProcess), so peak_rss_kb is:
+- pipeline_process: ru_maxrss of this process (harness + orchestrator)
+- largest_child_process: ru_maxrss over finished children = the single
+  largest XMLTV worker process, not a sum across workers (only a small
+  helper-process figure when xml_workers resolves to in-process)
+--not-modified is inert for now: SourceDownloader sends no If-None-Match /
+If-Modified-Since, so server.not_modified stays 0.
+"""
+import argparse
+import csv
+import json
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .. import orchestrator
+from .stand_in_server import StandInConfig, StandInProcess
+
+
+def write_config_tree(base_dir: Path, server: StandInProcess, args: argparse.Namespace) -> None:
+    """Hard + soft configs for a run against the stand-in (no templates created)."""
+    catalog = server.catalog
+    config_dir = base_dir / "config"
+    for sub in ("main", "m3u", "sports", "epg"):
+        (config_dir / sub).mkdir(parents=True, exist_ok=True)
+
+    _write_json(config_dir / "main" / "paths.json", {
+        "nginx_dir": str(base_dir / "web"),
+        "tvh_xml_dir": str(base_dir / "xml"),
+        "log_dir": str(base_dir / "logs"),
+        "diagnostics_dir": str(base_dir / "logs" / "diagnostics"),
+    })
+    _write_json(config_dir / "main" / "settings.json", {
+        "network_timeout": args.network_timeout, "max_retries": args.max_retries,
+        "retry_delay": args.retry_delay, "log_retention_days": 14,
+        "log_level": args.log_level, "enable_compression": False,
+        "cleanup_on_startup": False, "timezone": "UTC", "publish_outputs": True,
+        "max_parallel_downloads": args.parallel_downloads,
+        "xml_workers": args.xml_workers,
+        "stream_probe_enabled": args.probe,
+        "stream_probe_mode": args.probe_mode,
+        "lazy_m3u_records": args.lazy_records,
+        "lineup_mode": args.lineup_mode,
+    })
+    _write_sources(config_dir / "m3u" / "m3u_sources.csv", [
+        (f"{server.base_url}/m3u/{name}.m3u", name) for name in catalog.provider_names()
+    ])
+    _write_sources(config_dir / "m3u" / "xml_sources.csv", [
+        (f"{server.base_url}/xmltv/{name}.xml.gz", name) for name in catalog.xml_names()
+    ])
+    _write_json(config_dir / "sports" / "sports_config.json", catalog.sports_config())
+    (config_dir / "sports" / "api_key.txt").write_text("stand-in-key\n")
+    _write_json(config_dir / "epg" / "category_map.json", catalog.category_map())
+
+
+def _write_json(path: Path, data: Dict) -> None:
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def _write_sources(path: Path, rows: List[tuple]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["url", "output_name", "description"])
+        for url, name in rows:
+            writer.writerow([url, name, name])
+
+
+def read_stage_timings(log_dir: Path) -> Dict[str, int]:
+    """step="stage" entries from logs/current/*_main.log (latest run)."""
+    timings: Dict[str, int] = {}
+    for log_file in sorted((log_dir / "current").glob("*_main.log*")):
+        with open(log_file, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry.get("step") == "stage":
+                    timings[entry["stage"]] = entry["elapsed_ms"]
+    return timings
+
+
+def output_sizes(base_dir: Path) -> Dict[str, int]:
+    sizes = {}
+    for sub in ("web", "xml"):
+        for path in sorted((base_dir / sub).glob("*")):
+            if path.is_file():
+                sizes[f"{sub}/{path.name}"] = path.stat().st_size
+    return sizes
+
+
+def run_loadtest(args: argparse.Namespace) -> Dict:
+    server_config = StandInConfig(
+        providers=args.providers, channels_per_provider=args.channels,
+        xml_sources=args.xml_sources, programmes_per_channel=args.programmes,
+        latency_ms=args.latency_ms, bandwidth_kbps=args.bandwidth_kbps,
+        error_rate=args.error_rate, not_modified=args.not_modified, seed=args.seed,
+        dead_stream_share=args.dead_streams,
+    )
+    server = StandInProcess(server_config).start()
+    base_dir = Path(tempfile.mkdtemp(prefix="m3u_loadtest_"))
+    try:
+        write_config_tree(base_dir, server, args)
+        argv = ["--profile"] if args.profile else []
+
+        started = time.perf_counter()
+        exit_code = orchestrator.main(argv, base_dir=base_dir)
+        wall_s = time.perf_counter() - started
+
+        # Linux ru_maxrss is KiB. Read before the stand-in exits: RUSAGE_CHILDREN
+        # is the max over finished children (XMLTV workers), not a sum
+        peak_rss_kb = {
+            "pipeline_process": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "largest_child_process": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        }
+        server_stats = server.stop()
+        return {
+            "exit_code": exit_code,
+            "wall_s": round(wall_s, 3),
+            "stages_ms": read_stage_timings(base_dir / "logs"),
+            "peak_rss_kb": peak_rss_kb,
+            "outputs": output_sizes(base_dir),
+            "server": server_stats,
+            "stand_in": asdict(server_config),
+            "app_dir": str(base_dir) if args.keep else None,
+        }
+    finally:
+        server.stop()
+        if not args.keep:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m src.tools.loadtest")
+    stand_in = parser.add_argument_group("stand-in server")
+    stand_in.add_argument("--providers", type=int, default=5)
+    stand_in.add_argument("--channels", type=int, default=2000, help="channels per provider")
+    stand_in.add_argument("--xml-sources", type=int, default=2)
+    stand_in.add_argument("--programmes", type=int, default=24, help="programmes per channel")
+    stand_in.add_argument("--latency-ms", type=int, default=0)
+    stand_in.add_argument("--bandwidth-kbps", type=int, default=0, help="0 = unthrottled")
+    stand_in.add_argument("--error-rate", type=float, default=0.0)
+    stand_in.add_argument("--not-modified", choices=("honor", "always", "never"), default="honor",
+                          help="304 behavior; inert until the downloader sends validators")
+    stand_in.add_argument("--dead-streams", type=float, default=0.2, help="share of dead stream URLs")
+    stand_in.add_argument("--seed", type=int, default=1)
+    run = parser.add_argument_group("pipeline settings")
+    run.add_argument("--network-timeout", type=int, default=30)
+    run.add_argument("--max-retries", type=int, default=1)
+    run.add_argument("--retry-delay", type=int, default=0)
+    run.add_argument("--parallel-downloads", type=int, default=4)
+    run.add_argument("--xml-workers", type=int, default=0)
+    run.add_argument("--probe", action="store_true", help="enable the stream liveness probe stage")
+    run.add_argument("--probe-mode", choices=("reorder", "prune"), default="reorder")
+    run.add_argument("--lazy-records", action="store_true", help="settings.lazy_m3u_records")
+    run.add_argument("--lineup-mode", choices=("sequential", "interval"), default="sequential",
+                     help="settings.lineup_mode")
+    run.add_argument("--log-level", default="INFO")
+    run.add_argument("--profile", action="store_true", help="pass --profile to the orchestrator")
+    parser.add_argument("--keep", action="store_true", help="keep the generated app dir")
+    parser.add_argument("--output", type=Path, help="also write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = run_loadtest(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return report["exit_code"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
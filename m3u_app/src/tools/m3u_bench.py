@@ -0,0 +1,101 @@
+# src/tools/m3u_bench.py
+"""
+M3U parse + write throughput: eager ChannelRecords vs LazyChannelRecords.
+
+    cd /opt/m3u_app && python3 -m src.tools.m3u_bench --channels 200000
+
+Playlist comes from SyntheticCatalog (same shape as the load-test
+providers). --touch-share of records get one read of each LAZY_ATTRIBUTES
+plus a group-title change, as ChannelProcessor would for sports/renames;
+every other record is only read via attribute(). Prints a JSON report
+(best of --repeat) with MB/s and records/s per mode.
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..m3u.parser import LAZY_ATTRIBUTES, M3UParser
+from ..m3u.writer import M3UWriter
+from .stand_in_server import StandInConfig, SyntheticCatalog
+
+
+def build_playlist(channels: int, seed: int) -> bytes:
+    catalog = SyntheticCatalog(StandInConfig(providers=1, channels_per_provider=channels, seed=seed))
+    catalog.base_url = "http://bench.invalid"
+    return catalog.payload(f"/m3u/{catalog.provider_names()[0]}.m3u")
+
+
+def run_once(data: bytes, lazy: bool, touch_share: float, seed: int, output_path: Path) -> Dict:
+    logger = logging.getLogger("m3u_bench")
+    rng = random.Random(seed)
+
+    started = time.perf_counter()
+    header, records = M3UParser(logger, lazy=lazy).parse_m3u(data, "bench")
+    parsed = time.perf_counter()
+    for record in records:
+        for name in LAZY_ATTRIBUTES:
+            record.attribute(name)
+        if rng.random() < touch_share:
+            record.set_attribute("group-title", "Touched")
+    processed = time.perf_counter()
+    M3UWriter(logger).write_provider_m3u(records, header, output_path)
+    written = time.perf_counter()
+
+    total_s = written - started
+    return {
+        "parse_s": round(parsed - started, 4),
+        "process_s": round(processed - parsed, 4),
+        "write_s": round(written - processed, 4),
+        "total_s": round(total_s, 4),
+        "mb_per_s": round(len(data) / total_s / 1e6, 1),
+        "records_per_s": int(len(records) / total_s),
+        "output_bytes": output_path.stat().st_size,
+    }
+
+
+def run_bench(args: argparse.Namespace) -> Dict:
+    data = build_playlist(args.channels, args.seed)
+    report: Dict = {"channels": args.channels, "input_bytes": len(data),
+                    "touch_share": args.touch_share, "modes": {}}
+    with tempfile.TemporaryDirectory(prefix="m3u_bench_") as tmp:
+        for mode in ("eager", "lazy"):
+            runs = [
+                run_once(data, mode == "lazy", args.touch_share, args.seed, Path(tmp) / f"{mode}.m3u")
+                for _ in range(args.repeat)
+            ]
+            report["modes"][mode] = min(runs, key=lambda r: r["total_s"])
+        if args.touch_share == 0:
+            # Nothing changed → lazy output must be the input, byte for byte
+            report["lazy_identical_to_input"] = (Path(tmp) / "lazy.m3u").read_bytes() == data
+    eager, lazy = report["modes"]["eager"], report["modes"]["lazy"]
+    report["speedup"] = round(eager["total_s"] / lazy["total_s"], 2)
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m src.tools.m3u_bench")
+    parser.add_argument("--channels", type=int, default=200000)
+    parser.add_argument("--touch-share", type=float, default=0.1, help="share of records modified")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="also write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    text = json.dumps(run_bench(args), indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+# src/tools/stand_in_server.py
+"""
+StandInServer - Local HTTP stand-in for providers and api-sports.io.
+
+Routes (all payloads synthetic + deterministic for a given seed):
+- /m3u/<name>.m3u            provider playlist (regular + sports channels)
+- /xmltv/<name>.xml.gz       gzipped XMLTV covering the playlist tvg-ids
+- /<endpoint>/games?date=D   api-sports.io-shaped games response
+- /stream/<provider>/<n>.m3u8  channel stream (dead_stream_share → 404)
+
+Knobs per StandInConfig: payload size, latency, bandwidth throttle,
+injected 5xx error rate and 304 (conditional GET) behavior. The 304 knob
+only matters for clients sending If-None-Match / If-Modified-Since;
+SourceDownloader currently sends neither.
+
+StandInProcess runs the server in its own (spawned) process so the payload
+cache does not count towards the measuring process's RSS.
+"""
+import gzip
+import hashlib
+import json
+import multiprocessing
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+CHUNK_SIZE = 16 * 1024
+LAST_MODIFIED = formatdate(0, usegmt=True)  # Fixed: payloads never change per seed
+XMLTV_TIME_FORMAT = "%Y%m%d%H%M%S +0000"
+CATEGORIES = ["Action Sports", "Sports", "News", "Film Noir", "Movie", "Documentary"]
+
+
+@dataclass
+class StandInConfig:
+    providers: int = 5
+    channels_per_provider: int = 2000
+    sports_share: float = 0.1        # fraction of channels that are "A vs B" games
+    xml_sources: int = 2
+    programmes_per_channel: int = 24
+    teams: int = 30
+    latency_ms: int = 0              # added before every response
+    bandwidth_kbps: int = 0          # 0 = unthrottled
+    error_rate: float = 0.0          # probability of a 500 per request
+    not_modified: str = "honor"      # honor | always | never (304 behavior)
+    dead_stream_share: float = 0.2   # fraction of stream URLs answering 404
+    stream_head_allowed: bool = True  # False → 405 on HEAD (ranged GET fallback)
+    seed: int = 1
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    bytes_sent: int = 0
+    errors_injected: int = 0
+    not_modified: int = 0
+    by_route: Dict[str, int] = field(default_factory=dict)
+
+
+class SyntheticCatalog:
+    """Deterministic synthetic provider/EPG/API payloads (cached per path)."""
+
+    def __init__(self, config: StandInConfig):
+        self.config = config
+        self.league = "SYN"
+        self.endpoint = "basketball"
+        self.teams = [f"Team{index:03d} City" for index in range(config.teams)]
+        self.base_url = ""  # Set by StandInServer; stream URLs point back at it
+        self._cache: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def provider_names(self) -> List[str]:
+        return [f"Provider{index:02d}" for index in range(self.config.providers)]
+
+    def xml_names(self) -> List[str]:
+        return [f"Epg{index:02d}" for index in range(self.config.xml_sources)]
+
+    def sports_config(self) -> Dict:
+        return {
+            self.league: {
+                "service_prefix": self.league,
+                "game_duration": {"hours": 2, "minutes": 30},
+                "hints": [self.league, "SYNTHETIC"],
+                "api_sports": {"enabled": True, "endpoint": self.endpoint,
+                               "league_name": self.league},
+                "teams": {team: [team.split()[0]] for team in self.teams},
+            }
+        }
+
+    def category_map(self) -> Dict[str, str]:
+        return {"Action Sports": "Sports", "Movie": "Movies", "Documentary": "Documentary"}
+
+    def payload(self, path: str) -> bytes:
+        with self._lock:
+            if path not in self._cache:
+                self._cache[path] = self._build(path)
+            return self._cache[path]
+
+    def stream_is_live(self, path: str) -> bool:
+        digest = hashlib.sha1(f"{self.config.seed}:{path}".encode()).digest()
+        return digest[0] / 256 >= self.config.dead_stream_share
+
+    def _matchups(self, salt: str) -> List[Tuple[str, str]]:
+        rng = random.Random(f"{self.config.seed}:{salt}")
+        pairs = []
+        for _ in range(max(1, len(self.teams) // 2)):
+            home, away = rng.sample(self.teams, 2)
+            pairs.append((home, away))
+        return pairs
+
+    def _build(self, path: str) -> bytes:
+        parsed = urlparse(path)
+        parts = [p for p in parsed.path.split("/") if p]
+        if len(parts) == 2 and parts[0] == "m3u":
+            return self._m3u(parts[1].rsplit(".", 1)[0])
+        if len(parts) == 2 and parts[0] == "xmltv":
+            return gzip.compress(self._xmltv(parts[1].split(".", 1)[0]), compresslevel=5)
+        if len(parts) == 2 and parts[1] == "games":
+            date = parse_qs(parsed.query).get("date", ["1970-01-01"])[0]
+            return self._games(parts[0], date)
+        raise KeyError(path)
+
+    def _channel_ids(self) -> List[str]:
+        """Shared regular tvg-id space so generic EPG filtering has hits."""
+        return [f"syn.channel{index:05d}" for index in range(self.config.channels_per_provider)]
+
+    def _m3u(self, name: str) -> bytes:
+        rng = random.Random(f"{self.config.seed}:{name}")
+        matchups = self._matchups("games")
+        lines = [f'#EXTM3U url-tvg="{self.base_url}/xmltv/{name}.xml.gz"']
+        for index, tvg_id in enumerate(self._channel_ids()):
+            if rng.random() < self.config.sports_share:
+                home, away = matchups[index % len(matchups)]
+                display = f"{away} vs {home}"
+                group = self.league
+                tvg_id = ""
+            else:
+                display = f"{index:03d} Channel {index} HD"
+                group = f"Group {index % 20}"
+            lines.append(
+                f'#EXTINF:-1 tvg-id="{tvg_id}" tvg-name="{display}" '
+                f'tvg-logo="http://logos.invalid/{index}.png" group-title="{group}",{display}'
+            )
+            lines.append(f"{self.base_url}/stream/{name}/{index}.m3u8")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _xmltv(self, name: str) -> bytes:
+        rng = random.Random(f"{self.config.seed}:{name}")
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        out = ['<?xml version="1.0" encoding="UTF-8"?>', '<tv generator-info-name="stand-in">']
+        channel_ids = self._channel_ids()
+        # Each source covers half the id space plus ids nobody carries (filtered out)
+        covered = channel_ids[rng.randrange(2)::2] + [f"noise.{name}.{i}" for i in range(100)]
+        for tvg_id in covered:
+            out.append(f'<channel id="{tvg_id}"><display-name>{tvg_id}</display-name></channel>')
+        for tvg_id in covered:
+            for slot in range(self.config.programmes_per_channel):
+                begin = start + timedelta(hours=slot)
+                category = rng.choice(CATEGORIES)
+                title = "Movie" if category == "Movie" else f"Show {slot}"
+                out.append(
+                    f'<programme start="{begin.strftime(XMLTV_TIME_FORMAT)}" '
+                    f'stop="{(begin + timedelta(hours=1)).strftime(XMLTV_TIME_FORMAT)}" '
+                    f'channel="{tvg_id}"><title lang="en">{title}</title>'
+                    f'<sub-title lang="en">Episode {slot}</sub-title>'
+                    f'<category lang="en">{category}</category></programme>'
+                )
+        out.append("</tv>")
+        return "\n".join(out).encode("utf-8")
+
+    def _games(self, endpoint: str, date: str) -> bytes:
+        day = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        response = []
+        for index, (home, away) in enumerate(self._matchups("games")):
+            tip = day + timedelta(hours=16 + (index % 6))
+            response.append({
+                "game": {
+                    "id": index,
+                    "date": {"timezone": "UTC", "date": date, "time": tip.strftime("%H:%M"),
+                             "timestamp": int(tip.timestamp())},
+                    "status": {"short": "NS", "long": "Not Started", "timer": None},
+                },
+                "league": {"id": 1, "name": self.league, "season": str(day.year)},
+                "teams": {"home": {"id": self.teams.index(home), "name": home},
+                          "away": {"id": self.teams.index(away), "name": away}},
+            })
+        return json.dumps({
+            "get": "games", "parameters": {"date": date}, "errors": [],
+            "results": len(response), "response": response,
+        }).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StandInServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        self._respond(send_body=True)
+
+    def do_HEAD(self) -> None:  # noqa: N802 - http.server API
+        self._respond(send_body=False)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        pass  # Keep harness output clean
+
+    def _respond(self, send_body: bool) -> None:
+        server = self.server
+        config = server.config
+        route = self.path.split("?", 1)[0].split("/")[1] if "/" in self.path else ""
+        server.count("requests", route)
+        if config.latency_ms:
+            time.sleep(config.latency_ms / 1000)
+
+        if config.error_rate and server.roll() < config.error_rate:
+            server.count("errors_injected")
+            self._send_status(500)
+            return
+
+        if route == "stream":
+            self._respond_stream(send_body)
+            return
+
+        try:
+            body = server.catalog.payload(self.path)
+        except (KeyError, ValueError):
+            self._send_status(404)
+            return
+
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self._is_not_modified(config.not_modified, etag):
+            server.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        if send_body:
+            self._write_throttled(body, config.bandwidth_kbps)
+
+    def _respond_stream(self, send_body: bool) -> None:
+        catalog = self.server.catalog
+        if not send_body and not self.server.config.stream_head_allowed:
+            self._send_status(405)
+        elif not catalog.stream_is_live(self.path):
+            self._send_status(404)
+        else:
+            body = b"#EXTM3U\n#EXT-X-TARGETDURATION:6\n" + b"#" * 4096
+            ranged = self.headers.get("Range") is not None
+            if ranged:
+                body = body[:1024]
+            self.send_response(206 if ranged else 200)
+            self.send_header("Content-Type", "application/vnd.apple.mpegurl")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+                self.server.count("bytes_sent", amount=len(body))
+
+    def _is_not_modified(self, mode: str, etag: str) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if mode == "never" or not (if_none_match or if_modified_since):
+            return False
+        if mode == "always":
+            return True
+        if if_none_match:
+            return etag in [tag.strip() for tag in if_none_match.split(",")]
+        try:
+            return parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(LAST_MODIFIED)
+        except (TypeError, ValueError):
+            return False
+
+    def _write_throttled(self, body: bytes, bandwidth_kbps: int) -> None:
+        per_chunk_s = CHUNK_SIZE / (bandwidth_kbps * 1024) if bandwidth_kbps else 0.0
+        for offset in range(0, len(body), CHUNK_SIZE):
+            chunk = body[offset:offset + CHUNK_SIZE]
+            self.wfile.write(chunk)
+            self.server.count("bytes_sent", amount=len(chunk))
+            if per_chunk_s:
+                time.sleep(per_chunk_s)
+
+    def _send_status(self, code: int) -> None:
+        self.send_response(code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Threaded local server; start() runs it on a daemon thread."""
+    daemon_threads = True
+
+    def __init__(self, config: StandInConfig, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.config = config
+        self.catalog = SyntheticCatalog(config)
+        self.catalog.base_url = self.base_url
+        self.stats = ServerStats()
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="stand-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def roll(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def count(self, stat: str, route: str = "", amount: int = 1) -> None:
+        with self._lock:
+            setattr(self.stats, stat, getattr(self.stats, stat) + amount)
+            if route:
+                self.stats.by_route[route] = self.stats.by_route.get(route, 0) + amount
+
+
+def _serve(config: StandInConfig, conn) -> None:
+    """StandInProcess target: report base_url, serve until told to stop, report stats."""
+    server = StandInServer(config).start()
+    conn.send(server.base_url)
+    conn.recv()
+    server.stop()
+    conn.send(asdict(server.stats))
+    conn.close()
+
+
+class StandInProcess:
+    """StandInServer in a child process; catalog here is config-only (no payloads built)."""
+
+    def __init__(self, config: StandInConfig):
+        self.config = config
+        self.catalog = SyntheticCatalog(config)
+        self.base_url = ""
+        self._conn = None
+        self._process: Optional[multiprocessing.Process] = None
+
+    def start(self) -> "StandInProcess":
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(target=_serve, args=(self.config, child_conn),
+                                        name="stand-in", daemon=True)
+        self._process.start()
+        self.base_url = self.catalog.base_url = self._conn.recv()
+        return self
+
+    def stop(self) -> Dict:
+        """Stop the server process. Returns: its ServerStats as a dict."""
+        stats: Dict = {}
+        if self._process is None:
+            return stats
+        try:
+            self._conn.send("stop")
+            stats = self._conn.recv()
+        except (EOFError, OSError):
+            pass  # Server process already gone
+        self._process.join(10)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+        return stats